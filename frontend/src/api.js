@@ -28,10 +28,13 @@ export const getStations = async () => {
 };
 
 // ---------- Reviews ----------
-export const getReviews = async (stationId, limit = null, offset = 0) => {
+export const getReviews = async (stationId, limit = null, cursor = null) => {
   let url = `${API_URL}/reviews/?station=${stationId}`;
   if (limit) {
-    url += `&limit=${limit}&offset=${offset}`;
+    url += `&limit=${limit}`;
+  }
+  if (cursor) {
+    url += `&cursor=${encodeURIComponent(cursor)}`;
   }
   const res = await axios.get(url, {
     headers: getAuthHeaders(),
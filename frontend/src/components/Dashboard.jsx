@@ -8,6 +8,10 @@ import RatingDistribution from './RatingDistribution';
 import { getStations, getReviews, getStationStats, submitReview } from '../api';
 import { deleteReview } from '../api';
 
+// Cursor for the next page from a paginated reviews response ('next' is a query string)
+const nextCursor = (response) =>
+  response.next ? new URLSearchParams(response.next.split('?')[1]).get('cursor') : null;
+
 export default function Dashboard() {
   const [stations, setStations] = useState([]);
   const [selectedStation, setSelectedStation] = useState(null);
@@ -18,7 +22,7 @@ export default function Dashboard() {
   const [loadingStats, setLoadingStats] = useState(false);
   const [loadingMoreReviews, setLoadingMoreReviews] = useState(false);
   const [hasMoreReviews, setHasMoreReviews] = useState(false);
-  const [reviewsOffset, setReviewsOffset] = useState(0);
+  const [reviewsCursor, setReviewsCursor] = useState(null);
   const [currentUser, setCurrentUser] = useState(null);
   const [submittingReview, setSubmittingReview] = useState(false);
 
@@ -35,18 +39,17 @@ export default function Dashboard() {
 
     // Reset reviews when station changes
     setReviews([]);
-    setReviewsOffset(0);
+    setReviewsCursor(null);
     setHasMoreReviews(false);
 
     // Load first 20 reviews
     setLoadingReviews(true);
-    getReviews(selectedStation.id, 20, 0)
+    getReviews(selectedStation.id, 20)
       .then((response) => {
         const reviewsData = response.results || response;
-        const totalCount = response.count || reviewsData.length;
         setReviews(reviewsData);
-        setReviewsOffset(20);
-        setHasMoreReviews(reviewsData.length < totalCount);
+        setReviewsCursor(nextCursor(response));
+        setHasMoreReviews(Boolean(response.next));
         setLoadingReviews(false);
       })
       .catch((err) => {
@@ -72,14 +75,12 @@ export default function Dashboard() {
 
     setLoadingMoreReviews(true);
     try {
-      const response = await getReviews(selectedStation.id, 20, reviewsOffset);
+      const response = await getReviews(selectedStation.id, 20, reviewsCursor);
       const newReviews = response.results || response;
-      const totalCount = response.count;
 
       setReviews([...reviews, ...newReviews]);
-      const newOffset = reviewsOffset + newReviews.length;
-      setReviewsOffset(newOffset);
-      setHasMoreReviews(totalCount ? newOffset < totalCount : newReviews.length === 20);
+      setReviewsCursor(nextCursor(response));
+      setHasMoreReviews(Boolean(response.next));
     } catch (err) {
       console.error('Error loading more reviews:', err);
     } finally {
@@ -96,14 +97,13 @@ export default function Dashboard() {
 
       // Refresh reviews and stats
       const [newReviewsResponse, newStats] = await Promise.all([
-        getReviews(selectedStation.id, 20, 0),
+        getReviews(selectedStation.id, 20),
         getStationStats(selectedStation.id),
       ]);
       const newReviews = newReviewsResponse.results || newReviewsResponse;
-      const totalCount = newReviewsResponse.count || newReviews.length;
       setReviews(newReviews);
-      setReviewsOffset(20);
-      setHasMoreReviews(newReviews.length < totalCount);
+      setReviewsCursor(nextCursor(newReviewsResponse));
+      setHasMoreReviews(Boolean(newReviewsResponse.next));
       setStats(newStats);
     } finally {
       setSubmittingReview(false);
@@ -118,14 +118,13 @@ export default function Dashboard() {
       await deleteReview(reviewId);
       // Refresh reviews and stats
       const [newReviewsResponse, newStats] = await Promise.all([
-        getReviews(selectedStation.id, 20, 0),
+        getReviews(selectedStation.id, 20),
         getStationStats(selectedStation.id),
       ]);
       const newReviews = newReviewsResponse.results || newReviewsResponse;
-      const totalCount = newReviewsResponse.count || newReviews.length;
       setReviews(newReviews);
-      setReviewsOffset(20);
-      setHasMoreReviews(newReviews.length < totalCount);
+      setReviewsCursor(nextCursor(newReviewsResponse));
+      setHasMoreReviews(Boolean(newReviewsResponse.next));
       setStats(newStats);
     } catch (err) {
       console.error('Error deleting review:', err);
@@ -1,3 +1,5 @@
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -80,6 +82,14 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
+    # orjson-backed JSON (stdlib fallback) and MessagePack for Accept: application/msgpack;
+    # see reviews/renderers.py. Both libraries are optional.
+    'DEFAULT_RENDERER_CLASSES': (
+        'reviews.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'reviews.renderers.MessagePackRenderer',
+    ),
+    'DEFAULT_CONTENT_NEGOTIATION_CLASS': 'reviews.renderers.AvailableRendererNegotiation',
 }
 
 # CORS settings
@@ -101,3 +111,59 @@ STATIC_URL = 'static/'
 
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# ABSA model (reviews/ml/absa_pipeline.py)
+# The model is loaded lazily on first use. Web servers can set
+# ABSA_WARMUP_ON_STARTUP=1 to load it (and run one tiny batch) at boot instead;
+# leave it off for manage.py commands so they never import torch.
+ABSA_WARMUP_ON_STARTUP = os.environ.get('ABSA_WARMUP_ON_STARTUP', '') == '1'
+ABSA_BATCH_SIZE = 16
+ABSA_MAX_LENGTH = 128
+# Reviews longer than ABSA_MAX_LENGTH tokens are classified on up to
+# ABSA_MAX_WINDOWS windows around the aspect's keywords (logits averaged)
+# instead of being cut off after the first 128 tokens.
+ABSA_WINDOWED = True
+ABSA_MAX_WINDOWS = 4
+# Inference backend: 'torch' (fp32), 'torch-int8' (dynamic quantization) or
+# 'onnx' (ONNX Runtime, export the graph with `manage.py export_absa_onnx`).
+# Check label agreement against fp32 with `manage.py absa_parity` before switching.
+ABSA_BACKEND = os.environ.get('ABSA_BACKEND', 'torch')
+# Result cache in front of the model, keyed by (normalized text hash, aspect,
+# model version): an in-process LRU of ABSA_CACHE_SIZE entries backed by the
+# InferenceResult table. ABSA_MODEL_VERSION pins the version string explicitly.
+ABSA_CACHE_SIZE = 10000
+ABSA_CACHE_PERSISTENT = True
+ABSA_MODEL_VERSION = os.environ.get('ABSA_MODEL_VERSION', '')
+# Micro-batching scheduler: inference from concurrent requests is queued to one
+# worker thread and merged into batches of up to MAX_BATCH_SIZE pairs, waiting at
+# most MAX_WAIT_MS for more work. Callers give up after TIMEOUT seconds.
+ABSA_SCHEDULER_ENABLED = True
+ABSA_SCHEDULER_MAX_BATCH_SIZE = 32
+ABSA_SCHEDULER_MAX_WAIT_MS = 5
+ABSA_SCHEDULER_TIMEOUT = 30
+# Shared inference server (`manage.py run_absa_server`): when set, web workers
+# send inference to this Unix socket instead of loading their own model copy,
+# and fall back to the in-process model if the server can't be reached.
+ABSA_SERVER_SOCKET = os.environ.get('ABSA_SERVER_SOCKET', '')
+# Cheap-first cascade: a negation-aware lexicon (reviews/ml/lexicon.py) decides
+# pairs it is at least ABSA_CASCADE_THRESHOLD confident about and only the rest
+# go to the model. Check `manage.py cascade_report` before turning it on.
+ABSA_CASCADE = os.environ.get('ABSA_CASCADE', '') == '1'
+ABSA_CASCADE_THRESHOLD = 0.8
+# Station stats endpoint: read the incrementally maintained StationStats rows
+# (reviews/stats.py). Set False to aggregate from the review tables per request.
+STATION_STATS_MATERIALIZED = True
+# Response cache for station stats and per-station review pages
+# (reviews/response_cache.py), invalidated by per-station versions on every
+# write. The versions live in this cache too, so it must be shared by all server
+# processes: the file cache covers the workers of one host, use Redis, Memcached
+# or the database cache across hosts. A per-process LocMemCache fails the
+# reviews.E001 system check while RESPONSE_CACHE_ENABLED is on.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', os.path.join(tempfile.gettempdir(), 'metro_reviews_cache')),
+    }
+}
+RESPONSE_CACHE_ENABLED = True
+RESPONSE_CACHE_TIMEOUT = 60 * 60
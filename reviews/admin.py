@@ -1,6 +1,7 @@
 from django.contrib import admin
-from .models import Station, Review, AspectRating
+from .models import Station, Review, AspectRating, StationStats
 
 admin.site.register(Station)
 admin.site.register(Review)
 admin.site.register(AspectRating)
+admin.site.register(StationStats)
@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
+
+        # Load the ABSA model up front instead of on the first review submission
+        if getattr(settings, 'ABSA_WARMUP_ON_STARTUP', False):
+            from .ml.absa_pipeline import warmup
+            warmup()
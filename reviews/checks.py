@@ -0,0 +1,22 @@
+# reviews/checks.py
+from django.conf import settings
+from django.core.checks import Error, register
+
+PER_PROCESS_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+@register()
+def response_cache_is_shared(app_configs, **kwargs):
+    """The response cache's versions are only invalidated in the cache that saw the
+    write, so a per-process cache would serve stale pages from other workers."""
+    if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+        return []
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    if backend in PER_PROCESS_CACHES:
+        return [Error(
+            f'RESPONSE_CACHE_ENABLED needs a cache shared by all server processes, not {backend}.',
+            hint='Point CACHES["default"] at the file, database, Redis or Memcached backend, '
+                 'or set RESPONSE_CACHE_ENABLED = False.',
+            id='reviews.E001',
+        )]
+    return []
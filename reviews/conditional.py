@@ -0,0 +1,70 @@
+# reviews/conditional.py
+# Conditional GET for the read endpoints. ETags are derived from the change
+# versions in response_cache.py, so a matching If-None-Match gets a 304 after a
+# couple of cache lookups, before the view runs any query. Last-Modified is the
+# later of the newest review and the last write to the reviews (the version is
+# its time), so deletes, edits and reanalysis move it forward too.
+import hashlib
+from functools import wraps
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .models import Review
+from .response_cache import ALL_STATIONS, station_version
+
+
+def representation_etag(request, *versions):
+    """Strong ETag for this URL and Accept header at the given resource versions"""
+    raw = repr([request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), *versions])
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def newest_review_at(station_id=None, version=None):
+    """created_at of the newest review (of one station), looked up once per version"""
+    scope = ALL_STATIONS if station_id is None else station_id
+    key = f'newest-review:{scope}:{version or station_version(scope)}'
+    newest = cache.get(key)
+    if newest is None:
+        reviews = Review.objects.all() if station_id is None else Review.objects.filter(station_id=station_id)
+        newest = reviews.aggregate(newest=Max('created_at'))['newest'] or 0
+        cache.set(key, newest, timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60 * 60))
+    return newest or None
+
+
+def reviews_last_modified(station_id=None):
+    """Last change to the reviews (of one station): the newest review or the last write, whichever is later"""
+    version = station_version(ALL_STATIONS if station_id is None else station_id)
+    written = datetime.fromtimestamp(version / 1e9, tz=dt_timezone.utc)
+    return max(filter(None, [newest_review_at(station_id, version), written]))
+
+
+def start_of_today():
+    return timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+
+
+def conditional(etag_func, last_modified_func=None):
+    """django's @condition for DRF function views, plus Vary: Accept and
+    Cache-Control: no-cache so browsers revalidate instead of guessing freshness."""
+    def decorator(view):
+        conditional_view = condition(etag_func, last_modified_func)(view)
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_vary_headers(response, ['Accept'])
+            patch_cache_control(response, no_cache=True)
+            return response
+        return inner
+    return decorator
+
+
+def conditional_method(etag_func, last_modified_func=None):
+    """conditional() for viewset methods; the functions get (request, *args, **kwargs) without self."""
+    return method_decorator(conditional(etag_func, last_modified_func))
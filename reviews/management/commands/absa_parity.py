@@ -0,0 +1,88 @@
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.models import Review
+from reviews.ml.absa_pipeline import ABSAPipeline, detect_aspects_many, normalize_label
+from reviews.ml.backends import BACKENDS
+
+
+class Command(BaseCommand):
+    help = 'Compare an ABSA inference backend with the fp32 torch path: label agreement and latency'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backend',
+            type=str,
+            required=True,
+            choices=sorted(BACKENDS),
+            help='Backend to check against the fp32 reference',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=500,
+            help='Number of (most recent) reviews to use (default: 500)',
+        )
+        parser.add_argument(
+            '--station',
+            type=int,
+            help='Only use reviews for a specific station ID',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'ABSA_BATCH_SIZE', 16),
+            help='Inference batch size for both backends',
+        )
+
+    def run(self, pipeline, pairs, batch_size):
+        start = time.perf_counter()
+        labels = [normalize_label(label) for label in pipeline.predict_batch(pairs, batch_size=batch_size)]
+        return labels, time.perf_counter() - start
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.order_by('-created_at')
+        if options['station']:
+            reviews = reviews.filter(station_id=options['station'])
+        texts = [t for t in reviews.values_list('text', flat=True)[:options['limit']] if t and t.strip()]
+
+        pairs = [
+            (text, aspect)
+            for text, aspects in zip(texts, detect_aspects_many(texts))
+            for aspect in aspects
+        ]
+        if not pairs:
+            self.stdout.write(self.style.WARNING('No reviews to compare.'))
+            return
+        self.stdout.write(f'Comparing {options["backend"]} against torch on {len(pairs)} pairs from {len(texts)} reviews...')
+
+        # Both sides run with the served windowing so long reviews are compared as scored
+        config = {
+            'max_length': getattr(settings, 'ABSA_MAX_LENGTH', 128),
+            'windowed': getattr(settings, 'ABSA_WINDOWED', False),
+            'max_windows': getattr(settings, 'ABSA_MAX_WINDOWS', 4),
+        }
+        batch_size = options['batch_size']
+        reference, reference_time = self.run(ABSAPipeline(batch_size, backend='torch', **config), pairs, batch_size)
+        candidate, candidate_time = self.run(ABSAPipeline(batch_size, backend=options['backend'], **config), pairs, batch_size)
+
+        agree = sum(1 for a, b in zip(reference, candidate) if a == b)
+        self.stdout.write(self.style.SUCCESS(
+            f'\nLabel agreement: {agree}/{len(pairs)} ({agree / len(pairs) * 100:.1f}%)'
+        ))
+
+        # Agreement broken down by the reference label, plus the most common flips
+        totals = Counter(reference)
+        matches = Counter(a for a, b in zip(reference, candidate) if a == b)
+        for label in sorted(totals):
+            self.stdout.write(f'  - {label}: {matches[label]}/{totals[label]} ({matches[label] / totals[label] * 100:.1f}%)')
+        flips = Counter((a, b) for a, b in zip(reference, candidate) if a != b)
+        for (a, b), count in flips.most_common(5):
+            self.stdout.write(f'  {a} -> {b}: {count}')
+
+        self.stdout.write('\nLatency:')
+        for name, elapsed in (('torch', reference_time), (options['backend'], candidate_time)):
+            self.stdout.write(f'  - {name}: {elapsed:.2f}s, {len(pairs) / elapsed:.1f} pairs/s')
+        self.stdout.write(f'  Speedup: {reference_time / candidate_time:.2f}x')
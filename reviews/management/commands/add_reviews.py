@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from reviews.models import Station, Review
+from reviews.stats import rebuild_station_stats, stats_tracked
 from datetime import datetime
 
 
@@ -30,6 +31,8 @@ class Command(BaseCommand):
             help='List of review texts to add (use with --station)',
         )
 
+    # Stats are rebuilt for the touched stations at the end, not per review
+    @stats_tracked()
     def handle(self, *args, **options):
         reviews_to_add = []
         
@@ -107,6 +110,7 @@ class Command(BaseCommand):
         # Add reviews to database
         created_count = 0
         error_count = 0
+        touched_stations = set()
         
         for review_data in reviews_to_add:
             try:
@@ -126,6 +130,7 @@ class Command(BaseCommand):
                     rating=review_data['rating']
                 )
                 created_count += 1
+                touched_stations.add(station.id)
                 self.stdout.write(self.style.SUCCESS(
                     f'[+] Created review for {station.name} by {review_data["user"].username}: "{review_data["text"][:50]}..."'
                 ))
@@ -133,6 +138,10 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f'[!] Error creating review: {str(e)}'))
                 error_count += 1
         
+        # Reviews were created directly; recompute the affected stations' aggregates
+        if touched_stations:
+            rebuild_station_stats(touched_stations)
+
         self.stdout.write(self.style.SUCCESS(
             f'\nSummary: {created_count} reviews created, {error_count} errors'
         ))
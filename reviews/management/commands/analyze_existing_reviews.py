@@ -1,6 +1,41 @@
-from django.core.management.base import BaseCommand
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 from reviews.models import Review
-from reviews.views import analyze_review_aspects
+from reviews.views import analyze_reviews_aspects, stale_reviews
+from reviews.ml.cache import get_cache
+
+
+def _init_worker(torch_threads):
+    # Spawned (non-fork) workers start without Django configured
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    # Split the cores between workers instead of every process using all of them
+    import torch
+    torch.set_num_threads(torch_threads)
+
+
+def _analyze_shard(shard):
+    """Analyze reviews with first_id <= id <= last_id (or exactly `ids`); runs in a worker process."""
+    first_id, last_id, station_id, ids = shard
+    if ids is not None:
+        reviews = Review.objects.filter(id__in=ids)
+    else:
+        reviews = Review.objects.filter(id__range=(first_id, last_id)).order_by('id')
+    if station_id:
+        reviews = reviews.filter(station_id=station_id)
+    try:
+        results = analyze_reviews_aspects(reviews)
+    except Exception as e:
+        return first_id, last_id, 0, 0, str(e)
+    return first_id, last_id, len(results), sum(len(r) for r in results.values()), None
 
 
 class Command(BaseCommand):
@@ -17,34 +52,163 @@ class Command(BaseCommand):
             type=int,
             help='Only process reviews for a specific station ID',
         )
+        parser.add_argument(
+            '--stale-only',
+            action='store_true',
+            help='Only reanalyze reviews whose ratings are missing or from an older model/keyword version, '
+                 'busiest stations and newest reviews first',
+        )
+        parser.add_argument(
+            '--include-imported',
+            action='store_true',
+            help='With --stale-only, also overwrite human labels imported from CSV',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes (default: 1, in-process)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=200,
+            help='Reviews per shard; each shard is one batched inference pass (default: 200)',
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            default=os.path.join(tempfile.gettempdir(), 'metro_reviews_analyze_checkpoint.json'),
+            help='File recording finished shards (default: metro_reviews_analyze_checkpoint.json '
+                 'in the system temp directory)',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Skip shards already finished according to --checkpoint',
+        )
+
+    def load_checkpoint(self, path, run_filters):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            self.stdout.write(self.style.WARNING(f'No checkpoint at {path}, starting from the beginning'))
+            return set()
+        if checkpoint.get('filters') != run_filters:
+            raise CommandError(
+                f'Checkpoint {path} was written for {checkpoint.get("filters")}, not {run_filters}; '
+                'rerun with the same --station/--limit/--chunk-size or without --resume'
+            )
+        return {tuple(shard) for shard in checkpoint['done']}
+
+    def save_checkpoint(self, path, run_filters, done):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'filters': run_filters, 'done': sorted(done)}, f)
+        os.replace(tmp_path, path)
 
     def handle(self, *args, **options):
+        run_filters = {'station': options['station'], 'limit': options['limit'], 'chunk_size': options['chunk_size']}
+        checkpoint = options['checkpoint']
+        use_checkpoint = not options['stale_only']
+
         # Get reviews to process
-        reviews = Review.objects.all()
-        
+        if options['stale_only']:
+            reviews = stale_reviews(include_imported=options['include_imported'])
+        else:
+            reviews = Review.objects.order_by('id')
+
         if options['station']:
             reviews = reviews.filter(station_id=options['station'])
-        
+
         if options['limit']:
             reviews = reviews[:options['limit']]
-        
-        total = reviews.count()
-        self.stdout.write(f'Processing {total} reviews...')
-        
+
+        ids = list(reviews.values_list('id', flat=True))
+        chunk_size = options['chunk_size']
+        if options['stale_only']:
+            # Priority order isn't ID order, so shards carry their IDs explicitly.
+            # No checkpoint needed: finished reviews stop being stale.
+            shards = [
+                (chunk[0], chunk[-1], options['station'], chunk)
+                for chunk in (ids[i:i + chunk_size] for i in range(0, len(ids), chunk_size))
+            ]
+            done = set()
+        else:
+            # Split the ID list into contiguous ID-range shards of --chunk-size reviews
+            shards = [
+                (ids[i], ids[min(i + chunk_size, len(ids)) - 1], options['station'], None)
+                for i in range(0, len(ids), chunk_size)
+            ]
+            done = self.load_checkpoint(checkpoint, run_filters) if options['resume'] else set()
+        pending = [shard for shard in shards if shard[:2] not in done]
+
+        total = len(ids)
+        self.stdout.write(
+            f'Processing {total} reviews in {len(shards)} shards '
+            f'({len(shards) - len(pending)} already done) with {options["workers"]} worker(s)...'
+        )
+
         processed = 0
+        pairs = 0
         errors = 0
-        
-        for review in reviews:
-            try:
-                analyze_review_aspects(review)
-                processed += 1
-                if processed % 10 == 0:
-                    self.stdout.write(f'Processed {processed}/{total} reviews...')
-            except Exception as e:
-                errors += 1
-                self.stdout.write(self.style.ERROR(f'Error processing review {review.id}: {str(e)}'))
-        
+        start = time.perf_counter()
+
+        if options['workers'] > 1:
+            # Forked children must not share the parent's DB connection
+            connections.close_all()
+            torch_threads = max(1, (os.cpu_count() or 1) // options['workers'])
+            pool = multiprocessing.Pool(options['workers'], initializer=_init_worker, initargs=(torch_threads,))
+            results = pool.imap_unordered(_analyze_shard, pending)
+        else:
+            pool = None
+            results = map(_analyze_shard, pending)
+
+        try:
+            for first_id, last_id, shard_reviews, shard_pairs, error in results:
+                if error:
+                    errors += 1
+                    self.stdout.write(self.style.ERROR(f'Error processing reviews {first_id}-{last_id}: {error}'))
+                    continue
+                processed += shard_reviews
+                pairs += shard_pairs
+                done.add((first_id, last_id))
+                if use_checkpoint:
+                    self.save_checkpoint(checkpoint, run_filters, done)
+                self.stdout.write(f'Processed {processed}/{total} reviews...')
+        except BaseException:
+            # e.g. Ctrl-C: stop the workers now, finished shards are in the checkpoint
+            if pool is not None:
+                pool.terminate()
+            raise
+        else:
+            if pool is not None:
+                pool.close()
+        finally:
+            if pool is not None:
+                pool.join()
+
+        elapsed = time.perf_counter() - start
         self.stdout.write(self.style.SUCCESS(
-            f'\nCompleted: {processed} reviews processed, {errors} errors'
+            f'\nCompleted: {processed} reviews processed, {errors} failed shards'
         ))
+        if processed:
+            self.stdout.write(
+                f'Throughput: {processed / elapsed:.1f} reviews/s, {pairs / elapsed:.1f} pairs/s '
+                f'({pairs} pairs in {elapsed:.1f}s)'
+            )
+        if errors:
+            self.stdout.write(self.style.WARNING(
+                'Rerun with --resume to retry the failed shards' if use_checkpoint
+                else 'Rerun with --stale-only to retry the failed shards'
+            ))
+        elif use_checkpoint and os.path.exists(checkpoint):
+            os.remove(checkpoint)
 
+        if pool is None:
+            stats = get_cache().stats()
+            self.stdout.write(
+                f'Inference cache: {stats["memoryHits"]} memory hits, {stats["dbHits"]} DB hits, '
+                f'{stats["misses"]} misses (hit rate {stats["hitRate"] * 100:.1f}%)'
+            )
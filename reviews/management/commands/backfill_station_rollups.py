@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from reviews.stats import rebuild_station_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the daily per-station rating and aspect rollups from the review tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--station',
+            type=int,
+            action='append',
+            help='Only backfill this station ID (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_station_stats(options['station'], aggregates=False)
+        self.stdout.write(self.style.SUCCESS(f'Backfilled daily rollups for {count} station(s)'))
@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from reviews.models import Review, Station
+from reviews.renderers import FastJSONRenderer, MessagePackRenderer, msgpack, orjson
+from reviews.serializers import ReviewReadSerializer
+from reviews.views import materialized_station_stats
+
+
+class Command(BaseCommand):
+    help = 'Compare response size and render time of the JSON and MessagePack renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--station',
+            type=int,
+            help='Station to render (default: the station with the most reviews)',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Reviews per page (default: 20)',
+        )
+        parser.add_argument(
+            '--fields',
+            type=str,
+            help='Comma-separated sparse fieldset to compare against the full page, e.g. id,text,rating',
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=200,
+            help='Renders per measurement; the mean is reported (default: 200)',
+        )
+
+    def render_time(self, renderer, data, runs):
+        """(bytes, mean render time in seconds) of renderer.render(data)"""
+        start = time.perf_counter()
+        for _ in range(runs):
+            body = renderer.render(data)
+        return len(body), (time.perf_counter() - start) / runs
+
+    def handle(self, *args, **options):
+        station_id = options['station']
+        if station_id is None:
+            station = Station.objects.order_by('-stats__review_count', 'id').first()
+            if station is None:
+                raise CommandError('No stations to render')
+            station_id = station.id
+
+        reviews = Review.objects.filter(station_id=station_id).order_by('-created_at', '-id')[:options['limit']]
+        payloads = [
+            (f'reviews page ({options["limit"]})', {'results': ReviewReadSerializer(reviews).data}),
+            ('station stats', materialized_station_stats(station_id)),
+        ]
+        if options['fields']:
+            fields = [name.strip() for name in options['fields'].split(',') if name.strip()]
+            payloads.insert(1, (
+                f'reviews page fields={",".join(fields)}',
+                {'results': ReviewReadSerializer(reviews, fields).data},
+            ))
+
+        renderers = [('stdlib JSON', JSONRenderer())]
+        if orjson is not None:
+            renderers.append(('orjson JSON', FastJSONRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING('orjson is not installed; FastJSONRenderer falls back to stdlib'))
+        if msgpack is not None:
+            renderers.append(('MessagePack', MessagePackRenderer()))
+        else:
+            self.stdout.write(self.style.WARNING('msgpack is not installed; skipping MessagePackRenderer'))
+
+        self.stdout.write(f'Station {station_id}, {options["runs"]} renders each')
+        for payload_name, data in payloads:
+            self.stdout.write(self.style.MIGRATE_HEADING(payload_name))
+            baseline = None
+            for name, renderer in renderers:
+                size, seconds = self.render_time(renderer, data, options['runs'])
+                baseline = baseline or (size, seconds)
+                self.stdout.write(
+                    f'{name:>12}: {size} bytes ({size / baseline[0]:.0%}), '
+                    f'{seconds * 1e6:.1f} µs ({baseline[1] / seconds:.1f}x)'
+                )
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Top-level packages that only the ABSA model needs
+ML_MODULES = {'torch', 'transformers'}
+
+
+class Command(BaseCommand):
+    help = 'Time non-ML manage.py commands and check that they never import torch/transformers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--commands',
+            nargs='+',
+            default=['check', 'help delete_stations', 'help add_stations', 'help migrate'],
+            help='manage.py commands to time (quote commands that take arguments)',
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Number of runs per command (default: 3)',
+        )
+
+    def ml_imports(self, importtime_output):
+        """Top-level ML packages found in `python -X importtime` output."""
+        found = set()
+        for line in importtime_output.splitlines():
+            if not line.startswith('import time:'):
+                continue
+            module = line.rsplit('|', 1)[-1].strip()
+            if module.split('.')[0] in ML_MODULES:
+                found.add(module.split('.')[0])
+        return found
+
+    def handle(self, *args, **options):
+        manage_py = os.path.join(settings.BASE_DIR, 'manage.py')
+        # Never let the benchmark itself trigger the warmup hook
+        env = dict(os.environ, ABSA_WARMUP_ON_STARTUP='')
+
+        offenders = []
+        for command in options['commands']:
+            timings = []
+            imported = set()
+            for _ in range(options['runs']):
+                start = time.perf_counter()
+                result = subprocess.run(
+                    [sys.executable, '-X', 'importtime', manage_py, *command.split()],
+                    capture_output=True, text=True, env=env,
+                )
+                timings.append(time.perf_counter() - start)
+                imported |= self.ml_imports(result.stderr)
+                if result.returncode != 0:
+                    self.stdout.write(self.style.WARNING(f'  "{command}" exited with {result.returncode}'))
+
+            best = min(timings) * 1000
+            if imported:
+                offenders.append(command)
+                self.stdout.write(self.style.ERROR(
+                    f'[!] {command}: {best:.0f} ms (best of {len(timings)}), imported {", ".join(sorted(imported))}'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f'[+] {command}: {best:.0f} ms (best of {len(timings)}), no ML imports'
+                ))
+
+        if offenders:
+            raise CommandError(f'ML modules imported by: {", ".join(offenders)}')
@@ -0,0 +1,156 @@
+import random
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Avg, Count
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from reviews.models import AspectRating, Review, Station
+from reviews.stats import rebuild_station_stats
+from reviews.views import aggregate_station_stats, format_aspects, materialized_station_stats
+
+ASPECTS = [
+    "Cleanliness", "Crowd management", "General Safety", "Metro frequency", "Metro Station Connectivity",
+    "Metro station infrastructure", "Staff behavior", "Ticketing system", "Women's Safety",
+]
+SENTIMENTS = ["Positive", "Negative", "Neutral"]
+
+
+def legacy_station_stats(station_id):
+    """station_stats as it was before the aggregation path: six queries plus a loop over every AspectRating."""
+    reviews = Review.objects.filter(station_id=station_id)
+    total_reviews = reviews.count()
+    overall_rating = float(reviews.aggregate(avg=Avg('rating'))['avg'] or 0.0) if total_reviews else 0.0
+    review_dist_dict = {}
+    if total_reviews > 0:
+        for r in reviews.values('rating').annotate(count=Count('rating')):
+            review_dist_dict[int(r['rating'])] = int(r['count'])
+    aspect_scores = defaultdict(lambda: {"Positive": 0, "Negative": 0, "Neutral": 0})
+    for ar in AspectRating.objects.filter(review__in=reviews):
+        sentiment = ar.sentiment.capitalize()
+        aspect_scores[ar.aspect][sentiment if sentiment in SENTIMENTS else "Neutral"] += 1
+    current_month = datetime.now().month
+    return {
+        "overallRating": overall_rating,
+        "totalReviews": total_reviews,
+        "reviewDistribution": review_dist_dict,
+        "aspects": format_aspects(aspect_scores),
+        "recentTrends": {
+            "thisMonth": reviews.filter(created_at__month=current_month).count(),
+            "lastMonth": reviews.filter(created_at__month=current_month - 1 if current_month > 1 else 12).count(),
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the station stats implementations on a synthetic station (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reviews',
+            type=int,
+            default=100000,
+            help='Number of synthetic reviews (default: 100000)',
+        )
+        parser.add_argument(
+            '--aspects-per-review',
+            type=int,
+            default=2,
+            help='Aspect ratings per synthetic review (default: 2)',
+        )
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=3,
+            help='Timed runs per implementation; the best one is reported (default: 3)',
+        )
+
+    def populate(self, n_reviews, aspects_per_review):
+        rng = random.Random(0)
+        station = Station.objects.create(name=f'Benchmark station {time.time_ns()}', line='Benchmark')
+        user, _ = User.objects.get_or_create(username='benchmark')
+        now = timezone.now()
+        reviews = Review.objects.bulk_create(
+            [
+                Review(
+                    user=user, station=station, text=f'Synthetic review {i}',
+                    rating=rng.randint(1, 5), sentiment=rng.choice(SENTIMENTS),
+                )
+                for i in range(n_reviews)
+            ],
+            batch_size=5000,
+        )
+        # created_at is auto_now_add, so spread the reviews over the last year afterwards
+        by_day = defaultdict(list)
+        for review in reviews:
+            by_day[rng.randint(0, 365)].append(review.id)
+        for days, ids in by_day.items():
+            for i in range(0, len(ids), 5000):
+                Review.objects.filter(id__in=ids[i:i + 5000]).update(created_at=now - timedelta(days=days))
+        AspectRating.objects.bulk_create(
+            [
+                AspectRating(review=review, aspect=aspect, sentiment=rng.choice(SENTIMENTS))
+                for review in reviews
+                for aspect in rng.sample(ASPECTS, aspects_per_review)
+            ],
+            batch_size=5000,
+        )
+        rebuild_station_stats([station.id])
+        return station
+
+    def measure(self, fn, runs):
+        """(queries, best wall time in seconds, peak traced memory in bytes, result) of fn()"""
+        best = None
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        tracemalloc.start()
+        with CaptureQueriesContext(connection) as queries:
+            fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return len(queries), best, peak, result
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(
+                f'Creating a station with {options["reviews"]} reviews and '
+                f'{options["reviews"] * options["aspects_per_review"]} aspect ratings...'
+            )
+            station = self.populate(options['reviews'], options['aspects_per_review'])
+
+            implementations = [
+                ('before (per-row)', legacy_station_stats),
+                ('aggregated SQL', aggregate_station_stats),
+                ('materialized', materialized_station_stats),
+            ]
+            results = {}
+            for name, fn in implementations:
+                queries, seconds, peak, results[name] = self.measure(lambda: fn(station.id), options['runs'])
+                self.stdout.write(
+                    f'{name:>18}: {queries} queries, {seconds * 1000:.1f} ms, peak {peak / 1024:.0f} KiB'
+                )
+
+            def comparable(data):
+                # The old month counts ignored the year and trends were constant,
+                # so compare what all implementations compute the same way
+                return (
+                    data['overallRating'], data['totalReviews'], data['reviewDistribution'],
+                    {aspect: (a['sentiment'], a['percentage']) for aspect, a in data['aspects'].items()},
+                )
+            expected = comparable(results['before (per-row)'])
+            for name in ('aggregated SQL', 'materialized'):
+                if comparable(results[name]) != expected:
+                    self.stdout.write(self.style.ERROR(f'{name} returned a different payload'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(f'{name} matches the per-row payload'))
+
+            # Leave the database as it was
+            transaction.set_rollback(True)
@@ -0,0 +1,66 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from reviews.models import Review
+from reviews.ml.absa_pipeline import detect_aspects_many, label_for
+from reviews.ml.inference import predict_proba
+from reviews.ml.lexicon import lexicon_score
+
+
+class Command(BaseCommand):
+    help = 'Measure the lexicon/model cascade: model calls saved and agreement with model-only labels'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=500,
+            help='Number of (most recent) reviews to use (default: 500)',
+        )
+        parser.add_argument(
+            '--station',
+            type=int,
+            help='Only use reviews for a specific station ID',
+        )
+        parser.add_argument(
+            '--thresholds',
+            type=float,
+            nargs='+',
+            default=[0.6, 0.7, 0.8, 0.9, 0.95],
+            help='Confidence thresholds to report (default: 0.6 0.7 0.8 0.9 0.95)',
+        )
+
+    def handle(self, *args, **options):
+        reviews = Review.objects.order_by('-created_at')
+        if options['station']:
+            reviews = reviews.filter(station_id=options['station'])
+        texts = [t for t in reviews.values_list('text', flat=True)[:options['limit']] if t and t.strip()]
+        pairs = [
+            (text, aspect)
+            for text, aspects in zip(texts, detect_aspects_many(texts))
+            for aspect in aspects
+        ]
+        if not pairs:
+            self.stdout.write(self.style.WARNING('No reviews to evaluate.'))
+            return
+
+        self.stdout.write(f'Scoring {len(pairs)} pairs from {len(texts)} reviews with the model and the lexicon...')
+        model_labels = [label_for(scores) for scores in predict_proba(pairs, bulk=True)]
+        lexicon = [lexicon_score(text, aspect) for text, aspect in pairs]
+
+        current = getattr(settings, 'ABSA_CASCADE_THRESHOLD', 0.8)
+        self.stdout.write('\nthreshold | skipped model calls | lexicon agreement | cascade agreement')
+        for threshold in sorted(set(options['thresholds']) | {current}):
+            decided = [
+                (label, model_label)
+                for (label, confidence), model_label in zip(lexicon, model_labels)
+                if confidence >= threshold
+            ]
+            agree = sum(1 for label, model_label in decided if label == model_label)
+            lexicon_agreement = f'{agree / len(decided) * 100:.1f}%' if decided else 'n/a'
+            # Pairs the lexicon leaves alone get the model label, so they always agree
+            cascade_agreement = (len(pairs) - len(decided) + agree) / len(pairs) * 100
+            line = (
+                f'{threshold:9.2f} | {len(decided):6d} ({len(decided) / len(pairs) * 100:5.1f}%)     '
+                f'| {lexicon_agreement:>17} | {cascade_agreement:.1f}%'
+            )
+            self.stdout.write(self.style.SUCCESS(line + '  <- ABSA_CASCADE_THRESHOLD') if threshold == current else line)
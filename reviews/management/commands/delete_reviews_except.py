@@ -1,9 +1,12 @@
 from django.core.management.base import BaseCommand
 from reviews.models import Station, Review, AspectRating
+from reviews.stats import rebuild_station_stats, stats_tracked
 
 class Command(BaseCommand):
     help = 'Delete all reviews except for specified stations'
 
+    # Stats are rebuilt for each cleared station, not per review
+    @stats_tracked()
     def handle(self, *args, **options):
         # Stations to keep
         keep_stations = ['Andheri', 'Azad Nagar', 'Western Express Highway']
@@ -30,6 +33,8 @@ class Command(BaseCommand):
                 # Delete all reviews (aspects will cascade delete)
                 Review.objects.filter(station=station).delete()
                 
+                rebuild_station_stats([station.id])
+                
                 total_reviews_deleted += review_count
                 total_aspects_deleted += aspect_count
                 
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from reviews.models import Station, Review, AspectRating
+from reviews.response_cache import invalidate_stations
+from reviews.stats import stats_tracked
 
 class Command(BaseCommand):
     help = 'Delete specified stations and all their associated reviews and aspects'
@@ -11,6 +13,8 @@ class Command(BaseCommand):
             help='Comma-separated list of station names to delete'
         )
 
+    # The stations' stats rows go with them
+    @stats_tracked()
     def handle(self, *args, **options):
         station_names = ['stations', 'central', 'north', 'south']
         
@@ -33,7 +37,8 @@ class Command(BaseCommand):
                 # Delete all reviews and aspects (cascade will handle aspects)
                 Review.objects.filter(station=station).delete()
                 
-                # Delete the station
+                # Delete the station and drop its cached responses
+                invalidate_stations([station.id])
                 station.delete()
                 
                 self.stdout.write(self.style.SUCCESS(f"  ✓ Station '{station_name}' deleted successfully"))
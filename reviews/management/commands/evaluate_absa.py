@@ -0,0 +1,236 @@
+import ast
+import csv
+import json
+import os
+import statistics
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from reviews.management.commands.import_reviews_from_csv import Command as ImportCommand
+from reviews.ml.absa_pipeline import ABSAPipeline, detect_aspects, label_for, normalize_label
+from reviews.ml.backends import BACKENDS
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Evaluate the ABSA pipeline (quality and speed) against a labeled review CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file',
+            type=str,
+            required=True,
+            help='CSV with a caption column and aspect_sentiment_pairs or per-aspect columns '
+                 '(same format as import_reviews_from_csv)',
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='Write the results as JSON here (stable key order, so runs can be diffed)',
+        )
+        parser.add_argument(
+            '--backend',
+            type=str,
+            choices=sorted(BACKENDS),
+            default=getattr(settings, 'ABSA_BACKEND', 'torch'),
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=getattr(settings, 'ABSA_BATCH_SIZE', 16),
+        )
+        parser.add_argument(
+            '--windowed',
+            type=int,
+            choices=[0, 1],
+            default=int(getattr(settings, 'ABSA_WINDOWED', False)),
+            help='Sliding-window inference for long reviews (1/0)',
+        )
+        parser.add_argument(
+            '--cascade',
+            type=int,
+            choices=[0, 1],
+            default=int(getattr(settings, 'ABSA_CASCADE', False)),
+            help='Lexicon-first cascade (1/0)',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=getattr(settings, 'ABSA_CASCADE_THRESHOLD', 0.8),
+            help='Cascade confidence threshold',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            help='Only use the first N labeled reviews',
+        )
+        parser.add_argument(
+            '--latency-sample',
+            type=int,
+            default=200,
+            help='Number of reviews timed one by one for p50/p95 latency (default: 200)',
+        )
+
+    def read_labeled_rows(self, path):
+        """[(caption, {aspect: sentiment})] for rows that have at least one label."""
+        mapper = ImportCommand()
+        aspect_columns = [
+            'Metro con', 'Metro stat', 'General Sa', 'Crowd ma',
+            'Ticketing s', "Women's", 'Metro fre', 'Staff beha', 'Cleanliness'
+        ]
+        rows = []
+        with open(path, 'r', encoding='utf-8') as f:
+            sample = f.read(1024)
+            f.seek(0)
+            delimiter = csv.Sniffer().sniff(sample).delimiter
+            for row in csv.DictReader(f, delimiter=delimiter):
+                caption = (row.get('caption') or '').strip()
+                if not caption:
+                    continue
+                gold = {}
+                pairs_raw = (row.get('aspect_sentiment_pairs') or '').strip()
+                if pairs_raw and pairs_raw.lower() != 'na':
+                    try:
+                        for pair in ast.literal_eval(pairs_raw):
+                            if str(pair[0]).strip():
+                                gold[str(pair[0]).strip()] = normalize_label(str(pair[1]).strip())
+                    except Exception:
+                        gold = {}
+                if not gold:
+                    for column in aspect_columns:
+                        sentiment = (row.get(column) or '').strip()
+                        aspect = mapper.map_csv_aspect_to_db_aspect(column)
+                        if aspect and sentiment and sentiment.lower() != 'na':
+                            gold[aspect] = normalize_label(sentiment)
+                if gold:
+                    rows.append((caption, gold))
+        return rows
+
+    def predict(self, pipeline, pairs, options):
+        if options['cascade']:
+            return pipeline.predict_cascade(pairs, options['threshold'], options['batch_size'])
+        scores = pipeline.predict_proba_batch(pairs, options['batch_size'])
+        return [label_for(row) for row in scores], ['model'] * len(pairs)
+
+    def handle(self, *args, **options):
+        if not os.path.exists(options['file']):
+            raise CommandError(f'File not found: {options["file"]}')
+        rows = self.read_labeled_rows(options['file'])
+        if options['limit']:
+            rows = rows[:options['limit']]
+        if not rows:
+            raise CommandError('No labeled rows found')
+
+        pipeline = ABSAPipeline(
+            batch_size=options['batch_size'],
+            max_length=getattr(settings, 'ABSA_MAX_LENGTH', 128),
+            backend=options['backend'],
+            windowed=bool(options['windowed']),
+            max_windows=getattr(settings, 'ABSA_MAX_WINDOWS', 4),
+        )
+        self.stdout.write(f'Evaluating on {len(rows)} labeled reviews...')
+
+        # Aspect detection: per-aspect precision / recall against the labeled aspects
+        true_pos, false_pos, false_neg = Counter(), Counter(), Counter()
+        for caption, gold in rows:
+            detected = set(detect_aspects(caption)) - {'General'}
+            for aspect in detected & gold.keys():
+                true_pos[aspect] += 1
+            for aspect in detected - gold.keys():
+                false_pos[aspect] += 1
+            for aspect in gold.keys() - detected:
+                false_neg[aspect] += 1
+        detection = {}
+        for aspect in sorted(set(true_pos) | set(false_pos) | set(false_neg)):
+            tp, fp, fn = true_pos[aspect], false_pos[aspect], false_neg[aspect]
+            detection[aspect] = {
+                'precision': round(tp / (tp + fp), 4) if tp + fp else 0.0,
+                'recall': round(tp / (tp + fn), 4) if tp + fn else 0.0,
+                'support': tp + fn,
+            }
+        tp, fp, fn = sum(true_pos.values()), sum(false_pos.values()), sum(false_neg.values())
+        detection_micro = {
+            'precision': round(tp / (tp + fp), 4) if tp + fp else 0.0,
+            'recall': round(tp / (tp + fn), 4) if tp + fn else 0.0,
+        }
+
+        # Sentiment on the labeled aspects (isolates the classifier from detection), in one bulk run
+        gold_pairs = [(caption, aspect) for caption, gold in rows for aspect in gold]
+        gold_labels = [gold[aspect] for _, gold in rows for aspect in gold]
+        start = time.perf_counter()
+        predicted, tiers = self.predict(pipeline, gold_pairs, options)
+        bulk_seconds = time.perf_counter() - start
+        correct = Counter()
+        support = Counter()
+        for (_, aspect), truth, label in zip(gold_pairs, gold_labels, predicted):
+            support[aspect] += 1
+            correct[aspect] += truth == label
+        sentiment = {
+            'accuracy': round(sum(correct.values()) / len(gold_pairs), 4),
+            'pairs': len(gold_pairs),
+            'perAspect': {a: round(correct[a] / support[a], 4) for a in sorted(support)},
+        }
+
+        # Latency: the submission path, one review at a time (detection + inference)
+        latencies = []
+        for caption, _ in rows[:options['latency_sample']]:
+            start = time.perf_counter()
+            self.predict(pipeline, [(caption, aspect) for aspect in detect_aspects(caption)], options)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        results = {
+            'config': {
+                'file': os.path.basename(options['file']),
+                'reviews': len(rows),
+                'backend': options['backend'],
+                'batchSize': options['batch_size'],
+                'windowed': bool(options['windowed']),
+                'cascade': bool(options['cascade']),
+                'threshold': options['threshold'] if options['cascade'] else None,
+            },
+            'detection': {'micro': detection_micro, 'perAspect': detection},
+            'sentiment': sentiment,
+            'latency': {
+                'reviews': len(latencies),
+                'p50Ms': round(statistics.median(latencies), 2),
+                'p95Ms': round(_percentile(latencies, 95), 2),
+            },
+            'throughput': {
+                'pairsPerS': round(len(gold_pairs) / bulk_seconds, 2),
+                'modelCalls': tiers.count('model'),
+                'lexiconDecided': tiers.count('lexicon'),
+            },
+        }
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nDetection: precision {detection_micro["precision"]:.3f}, recall {detection_micro["recall"]:.3f}'
+        ))
+        for aspect, scores in detection.items():
+            self.stdout.write(
+                f'  - {aspect}: P {scores["precision"]:.3f} R {scores["recall"]:.3f} (n={scores["support"]})'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Sentiment accuracy: {sentiment["accuracy"] * 100:.1f}% on {sentiment["pairs"]} labeled pairs'
+        ))
+        self.stdout.write(
+            f'Latency per review: p50 {results["latency"]["p50Ms"]} ms, p95 {results["latency"]["p95Ms"]} ms'
+        )
+        self.stdout.write(
+            f'Throughput: {results["throughput"]["pairsPerS"]} pairs/s '
+            f'({results["throughput"]["lexiconDecided"]} pairs decided by the lexicon)'
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(f'Results written to {options["output"]}')
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from reviews.ml.absa_pipeline import MODEL_DIR, _load_model
+from reviews.ml.backends import export_onnx, onnx_path
+
+
+class Command(BaseCommand):
+    help = 'Export the DeBERTa ABSA model to ONNX for the onnx inference backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            default=onnx_path(MODEL_DIR),
+            help='Where to write the graph (default: deberta_absa_model/model.onnx)',
+        )
+        parser.add_argument(
+            '--opset',
+            type=int,
+            default=17,
+            help='ONNX opset version (default: 17)',
+        )
+
+    def handle(self, *args, **options):
+        from transformers import AutoTokenizer
+
+        self.stdout.write('Loading fp32 model...')
+        tokenizer = AutoTokenizer.from_pretrained(MODEL_DIR)
+        model = _load_model(MODEL_DIR)
+
+        self.stdout.write(f'Exporting to {options["output"]}...')
+        export_onnx(model, tokenizer, options['output'], opset=options['opset'])
+        self.stdout.write(self.style.SUCCESS(
+            f'\nExported. Set ABSA_BACKEND=onnx to use it, and run `manage.py absa_parity --backend onnx` first.'
+        ))
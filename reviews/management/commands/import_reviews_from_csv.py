@@ -7,6 +7,7 @@ import os
 import re
 import ast
 from reviews.models import Station, Review, AspectRating
+from reviews.stats import rebuild_station_stats, stats_tracked
 
 
 class Command(BaseCommand):
@@ -67,6 +68,8 @@ class Command(BaseCommand):
         }
         return mapping.get(csv_aspect, None)
 
+    # Stats are rebuilt for the station at the end, not per review
+    @stats_tracked()
     def handle(self, *args, **options):
         file_path = options['file']
         station_name = options['station']
@@ -178,7 +181,8 @@ class Command(BaseCommand):
                                                 AspectRating.objects.create(
                                                     review=review,
                                                     aspect=aspect_name,
-                                                    sentiment=db_sentiment
+                                                    sentiment=db_sentiment,
+                                                    model_version=AspectRating.IMPORTED
                                                 )
                                         except Exception:
                                             # skip malformed pair
@@ -215,7 +219,8 @@ class Command(BaseCommand):
                                     AspectRating.objects.create(
                                         review=review,
                                         aspect=db_aspect,
-                                        sentiment=db_sentiment
+                                        sentiment=db_sentiment,
+                                        model_version=AspectRating.IMPORTED
                                     )
                         
                         created_count += 1
@@ -233,6 +238,10 @@ class Command(BaseCommand):
         except Exception as e:
             self.stdout.write(self.style.ERROR(f'Error reading file: {str(e)}'))
             return
+        finally:
+            # Rows were written one by one above, also when reading broke off
+            # midway; recompute the station's aggregates once
+            rebuild_station_stats([station.id])
         
         self.stdout.write(self.style.SUCCESS(
             f'\nImport completed for {station_name}:'
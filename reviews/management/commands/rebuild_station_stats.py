@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from reviews.stats import rebuild_station_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized station stats and daily rollups from the review and aspect tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--station',
+            type=int,
+            action='append',
+            help='Only rebuild this station ID (can be repeated)',
+        )
+
+    def handle(self, *args, **options):
+        count = rebuild_station_stats(options['station'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt stats for {count} station(s)'))
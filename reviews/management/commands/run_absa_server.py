@@ -0,0 +1,72 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from reviews.ml.absa_pipeline import get_pipeline, warmup
+from reviews.ml.scheduler import MicroBatchScheduler
+from reviews.ml.server import InferenceServer
+
+
+class Command(BaseCommand):
+    help = 'Serve ABSA inference to all web workers on this host over a Unix socket'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--socket',
+            type=str,
+            default=getattr(settings, 'ABSA_SERVER_SOCKET', '') or '/tmp/absa.sock',
+            help='Unix socket path (default: ABSA_SERVER_SOCKET or /tmp/absa.sock)',
+        )
+        parser.add_argument(
+            '--max-batch-size',
+            type=int,
+            default=getattr(settings, 'ABSA_SCHEDULER_MAX_BATCH_SIZE', 32),
+            help='Maximum pairs per forward pass',
+        )
+        parser.add_argument(
+            '--max-wait-ms',
+            type=int,
+            default=getattr(settings, 'ABSA_SCHEDULER_MAX_WAIT_MS', 5),
+            help='How long to wait for more requests before running a batch',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            help='torch intra-op threads (default: torch decides)',
+        )
+
+    def handle(self, *args, **options):
+        if options['threads']:
+            import torch
+            torch.set_num_threads(options['threads'])
+
+        self.stdout.write('Loading ABSA model...')
+        warmup()
+        pipeline = get_pipeline()
+        scheduler = MicroBatchScheduler(
+            pipeline.predict_proba_batch,
+            max_batch_size=options['max_batch_size'],
+            max_wait_ms=options['max_wait_ms'],
+        )
+
+        path = options['socket']
+        try:
+            server = InferenceServer(path, scheduler, timeout_s=getattr(settings, 'ABSA_SCHEDULER_TIMEOUT', 30))
+        except OSError as e:
+            raise CommandError(f'Could not listen on {path}: {e}')
+        # Only this user and its group (the web workers) may connect
+        os.chmod(path, 0o660)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Serving {pipeline.backend_name} ABSA model on {path} '
+            f'(batches of up to {options["max_batch_size"]} pairs, {options["max_wait_ms"]} ms wait)'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if os.path.exists(path):
+                os.unlink(path)
+            self.stdout.write(f'\nStopped after {scheduler.batches} batches, {scheduler.pairs} pairs')
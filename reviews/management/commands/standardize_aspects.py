@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from reviews.models import AspectRating
+from reviews.stats import rebuild_station_stats
 from collections import defaultdict
 
 class Command(BaseCommand):
@@ -43,6 +44,9 @@ class Command(BaseCommand):
                 AspectRating.objects.filter(aspect=old_name).update(aspect=new_name)
                 self.stdout.write(f"Updated {count} ratings: {old_name} → {new_name}")
 
+        # Aspect names are keys of the materialized stats, so recompute them
+        rebuild_station_stats()
+
         self.stdout.write("\nAspect standardization complete!")
         
         # Show final stats
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_review_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InferenceResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_hash', models.CharField(max_length=64)),
+                ('aspect', models.CharField(max_length=50)),
+                ('model_version', models.CharField(max_length=40)),
+                ('scores', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('text_hash', 'aspect', 'model_version'), name='unique_inference_result')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_inferenceresult'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aspectrating',
+            name='model_version',
+            field=models.CharField(blank=True, db_index=True, max_length=40),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_aspectrating_model_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aspectrating',
+            name='decided_by',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+    ]
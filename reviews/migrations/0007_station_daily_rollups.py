@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:41
+
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+SENTIMENTS = ('Positive', 'Negative', 'Neutral')
+
+
+def backfill_rollups(apps, schema_editor):
+    """Fill the rollups of stations that already have a StationStats row.
+
+    Stations without one get their rollups along with the row on first use,
+    but an existing row would otherwise leave them empty. Same counts as
+    reviews.stats._fill_rollups, on the historical models.
+    """
+    StationStats = apps.get_model('reviews', 'StationStats')
+    Review = apps.get_model('reviews', 'Review')
+    AspectRating = apps.get_model('reviews', 'AspectRating')
+    StationDailyRating = apps.get_model('reviews', 'StationDailyRating')
+    StationDailyAspect = apps.get_model('reviews', 'StationDailyAspect')
+    for station_id in StationStats.objects.values_list('station_id', flat=True):
+        reviews = Review.objects.filter(station_id=station_id).annotate(day=TruncDate('created_at'))
+        StationDailyRating.objects.bulk_create([
+            StationDailyRating(station_id=station_id, day=row['day'], rating=row['rating'], count=row['n'])
+            for row in reviews.values('day', 'rating').annotate(n=Count('id')).order_by()
+        ], batch_size=1000)
+        aspects = Counter()
+        ratings = AspectRating.objects.filter(review__station_id=station_id).annotate(
+            day=TruncDate('review__created_at')
+        )
+        for row in ratings.values('day', 'aspect', 'sentiment').annotate(n=Count('id')).order_by():
+            sentiment = (row['sentiment'] or '').capitalize()
+            aspects[(row['day'], row['aspect'], sentiment if sentiment in SENTIMENTS else 'Neutral')] += row['n']
+        StationDailyAspect.objects.bulk_create([
+            StationDailyAspect(station_id=station_id, day=day, aspect=aspect, sentiment=sentiment, count=n)
+            for (day, aspect, sentiment), n in aspects.items()
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_stationstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StationDailyAspect',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('aspect', models.CharField(max_length=50)),
+                ('sentiment', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_aspects', to='reviews.station')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('station', 'day', 'aspect', 'sentiment'), name='unique_station_daily_aspect')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StationDailyRating',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rating', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_ratings', to='reviews.station')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('station', 'day', 'rating'), name='unique_station_daily_rating')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,12 @@
 # reviews/ml/absa_pipeline.py
-from transformers import AutoTokenizer, AutoModelForSequenceClassification 
-import torch, pandas as pd, os
+# torch / transformers are imported lazily (see get_pipeline) so that importing
+# this module - and therefore reviews.views - stays cheap for non-ML commands.
+import csv, hashlib, json, os, re, threading
+from bisect import bisect_right
 from collections import defaultdict
 
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "deberta_absa_model")
+
 # =======================
 # Aspects Keywords Dictionary
 # =======================
@@ -80,48 +84,373 @@ ASPECTS_KEYWORDS = {
     ],
 }
 
+# =======================
+# Compiled keyword matcher
+# =======================
+def _build_keyword_matcher(aspects_keywords):
+    """Compile every keyword into one word-boundary regex plus a keyword -> aspects map"""
+    keyword_aspects = defaultdict(list)
+    for aspect, keywords in aspects_keywords.items():
+        for kw in keywords:
+            if aspect not in keyword_aspects[kw.lower()]:
+                keyword_aspects[kw.lower()].append(aspect)
+    # Longest keywords first so e.g. "off-peak" is preferred over "peak".
+    # Whole words only (so "AC" no longer hits "access"), allowing a plural s/es.
+    alternation = "|".join(re.escape(kw) for kw in sorted(keyword_aspects, key=len, reverse=True))
+    pattern = re.compile(r"(?<!\w)(" + alternation + r")(?:e?s)?(?!\w)", re.IGNORECASE)
+    return pattern, dict(keyword_aspects)
+
+# built once at import
+KEYWORD_PATTERN, KEYWORD_ASPECTS = _build_keyword_matcher(ASPECTS_KEYWORDS)
+ASPECT_ORDER = {aspect: i for i, aspect in enumerate(ASPECTS_KEYWORDS)}
+
+
+def _ordered_aspects(hits):
+    if not hits:
+        return ["General"]
+    return sorted(hits, key=ASPECT_ORDER.__getitem__)
+
+
+def detect_aspects(text):
+    """Rule-based aspect detection using keywords, in a single pass over the text"""
+    hits = set()
+    for match in KEYWORD_PATTERN.finditer(text):
+        hits.update(KEYWORD_ASPECTS[match.group(1).lower()])
+    return _ordered_aspects(hits)
+
+
+def detect_aspects_many(texts):
+    """detect_aspects for a list of texts with one regex pass over all of them"""
+    texts = [text or "" for text in texts]
+    # Join with a non-word separator so word boundaries still hold at the seams,
+    # then map each hit back to its text by offset
+    starts = []
+    offset = 0
+    for text in texts:
+        starts.append(offset)
+        offset += len(text) + 1
+    hits = [set() for _ in texts]
+    for match in KEYWORD_PATTERN.finditer("\n".join(texts)):
+        hits[bisect_right(starts, match.start()) - 1].update(KEYWORD_ASPECTS[match.group(1).lower()])
+    return [_ordered_aspects(h) for h in hits]
+
+
+def normalize_label(label):
+    """Map a raw model label onto Positive / Negative / Neutral"""
+    if not label or label == "0":
+        return "Neutral"
+    label = str(label).strip().capitalize()
+    if label not in ["Positive", "Negative", "Neutral"]:
+        return "Neutral"
+    return label
+
+
+def _load_model(base_dir):
+    """Load the classifier, memory-mapping the weights where the checkpoint format allows it"""
+    import torch
+    import transformers
+    from transformers import AutoConfig, AutoModelForSequenceClassification
+
+    if os.path.exists(os.path.join(base_dir, "model.safetensors")):
+        # safetensors checkpoints are memory-mapped by transformers itself
+        return AutoModelForSequenceClassification.from_pretrained(base_dir, use_safetensors=True)
+
+    bin_path = os.path.join(base_dir, "pytorch_model.bin")
+    if os.path.exists(bin_path):
+        try:
+            # zipfile-format torch checkpoints can be mmapped instead of read into RAM
+            state_dict = torch.load(bin_path, map_location="cpu", mmap=True, weights_only=True)
+        except (RuntimeError, TypeError):
+            # legacy (non-zip) checkpoint or a torch without mmap support
+            state_dict = None
+        if state_dict is not None:
+            config = AutoConfig.from_pretrained(base_dir)
+            model_class = getattr(transformers, config.architectures[0])
+            return model_class.from_pretrained(None, config=config, state_dict=state_dict)
+
+    return AutoModelForSequenceClassification.from_pretrained(base_dir)
+
+
+def _load_labels(base_dir):
+    with open(os.path.join(base_dir, "labels.csv"), newline="") as f:
+        labels = [row[0] for row in csv.reader(f) if row]
+    # Remove any empty or numeric entries, keep only alphabetic labels
+    return [str(l).strip() for l in labels if str(l).strip() and str(l).strip().isalpha()]
+
+
+_labels = None
+
+
+def get_labels():
+    """labels.csv mapping (index -> label) without loading the model"""
+    global _labels
+    if _labels is None:
+        _labels = _load_labels(MODEL_DIR)
+    return _labels
+
+
+def label_for(scores):
+    """Normalized label for one row of class probabilities"""
+    return normalize_label(get_labels()[max(range(len(scores)), key=scores.__getitem__)])
+
+
+def overall_label(rows):
+    """Overall label for a review from its aspects' class probabilities (their mean)"""
+    if not rows:
+        return "Neutral"
+    return label_for([sum(column) / len(rows) for column in zip(*rows)])
+
+
+_model_version = None
+
+
+def checkpoint_fingerprint(model_dir, backend="torch"):
+    """sha256 over the contents of every file in the model directory (weights,
+    config, labels, tokenizer). model.onnx only counts for the onnx backend,
+    since the other backends don't read it."""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(model_dir)):
+        path = os.path.join(model_dir, name)
+        if not os.path.isfile(path) or (name.endswith(".onnx") and backend != "onnx"):
+            continue
+        digest.update(name.encode() + b"\0")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest
+
+
+def model_version():
+    """Short fingerprint of everything that changes predictions: checkpoint, labels, backend, truncation/windowing.
+
+    The checkpoint files are hashed by content once per process, so a retrained
+    model with identically sized weights still gets a new version.
+    Set ABSA_MODEL_VERSION to pin it explicitly.
+    """
+    global _model_version
+    if _model_version is None:
+        from django.conf import settings
+        version = getattr(settings, "ABSA_MODEL_VERSION", None)
+        if not version:
+            backend = getattr(settings, "ABSA_BACKEND", "torch")
+            digest = checkpoint_fingerprint(MODEL_DIR, backend)
+            digest.update(json.dumps([
+                backend,
+                getattr(settings, "ABSA_MAX_LENGTH", 128),
+                getattr(settings, "ABSA_WINDOWED", False),
+                getattr(settings, "ABSA_MAX_WINDOWS", 4),
+            ]).encode())
+            version = digest.hexdigest()[:12]
+        _model_version = version
+    return _model_version
+
+
+def keywords_version():
+    """Fingerprint of ASPECTS_KEYWORDS - changing the dictionary changes which aspects get rated"""
+    return hashlib.sha1(json.dumps(ASPECTS_KEYWORDS, sort_keys=True).encode()).hexdigest()[:8]
+
+
+def analysis_version():
+    """Version stamped on every AspectRating: model + keyword dictionary (+ cascade lexicon) fingerprints"""
+    from django.conf import settings
+
+    version = f"{model_version()}-{keywords_version()}"
+    if getattr(settings, "ABSA_CASCADE", False):
+        from .lexicon import lexicon_version
+        threshold = getattr(settings, "ABSA_CASCADE_THRESHOLD", 0.8)
+        version += f"-lx{lexicon_version()}@{threshold:g}"
+    return version
+
+
 class ABSAPipeline:
-    def __init__(self):
-        base_dir = os.path.join(os.path.dirname(__file__), "deberta_absa_model")
+    def __init__(self, batch_size=16, max_length=128, backend="torch", windowed=False, max_windows=4):
+        import torch
+        from transformers import AutoTokenizer
+        from .backends import get_backend
+
+        base_dir = MODEL_DIR
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.tokenizer = AutoTokenizer.from_pretrained(base_dir)
-        self.model = AutoModelForSequenceClassification.from_pretrained(base_dir).to(self.device)
-        label_path = os.path.join(base_dir, "labels.csv")
-        labels = pd.read_csv(label_path, header=None).squeeze()
-        # Remove any empty or numeric entries, keep only alphabetic labels
-        self.labels = [str(l).strip() for l in labels if str(l).strip() and str(l).strip().isalpha()]
+        # torch (fp32), torch-int8 or onnx - see reviews/ml/backends.py
+        self.backend = get_backend(backend, base_dir, self.device, _load_model)
+        self.backend_name = backend
+        self.batch_size = batch_size
+        self.max_length = max_length
+        # Long texts: classify windows around the aspect's keywords instead of the head
+        self.windowed = windowed
+        self.max_windows = max_windows
+        self.labels = get_labels()
 
     def detect_aspects(self, text):
         """Rule-based aspect detection using keywords"""
-        text_lower = text.lower()
-        matched = []
-        for aspect, keywords in ASPECTS_KEYWORDS.items():
-            for kw in keywords:
-                if kw.lower() in text_lower:
-                    matched.append(aspect)
+        return detect_aspects(text)
+
+    def detect_aspects_many(self, texts):
+        """Rule-based aspect detection for many texts at once"""
+        return detect_aspects_many(texts)
+
+    def encode_pairs(self, pairs):
+        """Model inputs for each (text, aspect) pair.
+
+        Every distinct text and aspect is tokenized once and reused across all of
+        its pairs; [CLS] text [SEP] aspect [SEP] is then assembled from the ids,
+        truncating only the text so the aspect is never cut off. In windowed mode a
+        text that doesn't fit yields one input per window (see text_windows).
+
+        Returns (inputs, owners): owners[k] is the index of the pair inputs[k] belongs to.
+        """
+        texts = list(dict.fromkeys(text for text, _ in pairs))
+        aspects = list(dict.fromkeys(aspect for _, aspect in pairs))
+        if not texts:
+            return [], []
+        text_ids = dict(zip(texts, self.tokenizer(texts, add_special_tokens=False)["input_ids"]))
+        aspect_ids = dict(zip(aspects, self.tokenizer(aspects, add_special_tokens=False)["input_ids"]))
+
+        inputs, owners = [], []
+        for i, (text, aspect) in enumerate(pairs):
+            budget = max(1, self.max_length - len(aspect_ids[aspect]) - 3)
+            for window in self.text_windows(text, text_ids[text], aspect, budget):
+                inputs.append(self.build_inputs(window, aspect_ids[aspect]))
+                owners.append(i)
+        return inputs, owners
+
+    def text_windows(self, text, ids, aspect, budget):
+        """Token windows of a text to classify for one aspect.
+
+        Short texts (or windowed mode off) give the usual head truncation. For long
+        texts, windows of `budget` tokens are centred on the aspect's keyword hits
+        (at most max_windows of them, hits already covered by a window are skipped),
+        so the model actually sees the part of the review about that aspect.
+        """
+        if not self.windowed or len(ids) <= budget:
+            return [ids[:budget]]
+
+        starts = [
+            match.start() for match in KEYWORD_PATTERN.finditer(text)
+            if aspect in KEYWORD_ASPECTS[match.group(1).lower()]
+        ]
+        if not starts:
+            return [ids[:budget]]
+
+        # Token position of each hit = length of the tokenized prefix before it
+        prefixes = self.tokenizer([text[:start] for start in starts], add_special_tokens=False)["input_ids"]
+        centers = []
+        for prefix in prefixes:
+            position = len(prefix)
+            if all(abs(position - c) > budget // 2 for c in centers):
+                centers.append(position)
+                if len(centers) == self.max_windows:
                     break
-        if not matched:
-            matched.append("General")
-        return matched
+
+        windows = []
+        for center in centers:
+            start = min(max(0, center - budget // 2), len(ids) - budget)
+            windows.append(ids[start:start + budget])
+        return windows
+
+    def build_inputs(self, text_ids, aspect_ids):
+        """[CLS] text [SEP] aspect [SEP] with token types, text truncated to fit max_length"""
+        text_ids = text_ids[:max(0, self.max_length - len(aspect_ids) - 3)]
+        cls, sep = self.tokenizer.cls_token_id, self.tokenizer.sep_token_id
+        features = {
+            "input_ids": [cls] + text_ids + [sep] + aspect_ids + [sep],
+            "token_type_ids": [0] * (len(text_ids) + 2) + [1] * (len(aspect_ids) + 1),
+            "attention_mask": [1] * (len(text_ids) + len(aspect_ids) + 3),
+        }
+        return {name: features[name] for name in self.tokenizer.model_input_names if name in features}
+
+    def predict_proba_batch(self, pairs, batch_size=None):
+        """Class probabilities for a list of (text, aspect) pairs.
+
+        Pairs are run through the model in mini-batches of ``batch_size`` (defaults
+        to ``self.batch_size``). Inputs are sorted by token length first, so each
+        batch holds similarly sized inputs and padding stays small; results come
+        back in the original order. Windowed pairs get the mean of their windows' logits.
+        """
+        import torch
+
+        batch_size = batch_size or self.batch_size
+        pairs = list(pairs)
+        inputs, owners = self.encode_pairs(pairs)
+        # Length buckets: contiguous runs of the length-sorted inputs
+        order = sorted(range(len(inputs)), key=lambda i: len(inputs[i]["input_ids"]))
+        logits = [None] * len(inputs)
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            batch = self.tokenizer.pad([inputs[i] for i in indices], return_tensors="pt")
+            for i, row in zip(indices, self.backend.logits(batch)):
+                logits[i] = row
+
+        per_pair = [[] for _ in pairs]
+        for owner, row in zip(owners, logits):
+            per_pair[owner].append(row)
+        return [
+            torch.softmax(torch.stack(rows).float().mean(dim=0), dim=-1).tolist()
+            for rows in per_pair
+        ]
+
+    def predict_batch(self, pairs, batch_size=None):
+        """Aspect-specific sentiment labels for a list of (text, aspect) pairs"""
+        return [
+            self.labels[max(range(len(p)), key=p.__getitem__)]
+            for p in self.predict_proba_batch(pairs, batch_size)
+        ]
+
+    def predict_cascade(self, pairs, threshold=0.8, batch_size=None):
+        """Lexicon first, model only for pairs the lexicon is less than `threshold` sure about.
+
+        Returns (labels, tiers) with tiers[i] in ("lexicon", "model").
+        """
+        from .lexicon import cascade
+
+        scores, tiers = cascade(pairs, threshold, lambda rest: self.predict_proba_batch(rest, batch_size))
+        return [label_for(row) for row in scores], tiers
 
     def predict_aspect_sentiment(self, text, aspect):
         """Aspect-specific sentiment prediction"""
-        self.model.eval()
-        inputs = self.tokenizer(
-            text, aspect,
-            padding=True,
-            truncation=True,
-            max_length=128,
-            return_tensors="pt"
-        ).to(self.device)
-        
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            idx = torch.argmax(outputs.logits, dim=1).item()
-        return self.labels[idx]
-
-# initialize once
-absa = ABSAPipeline()
+        return self.predict_batch([(text, aspect)])[0]
+
+# =======================
+# Lazily loaded shared pipeline
+# =======================
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """Return the process-wide ABSAPipeline, loading the model on first use (thread-safe)"""
+    global _pipeline
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                from django.conf import settings
+                _pipeline = ABSAPipeline(
+                    batch_size=getattr(settings, "ABSA_BATCH_SIZE", 16),
+                    max_length=getattr(settings, "ABSA_MAX_LENGTH", 128),
+                    backend=getattr(settings, "ABSA_BACKEND", "torch"),
+                    windowed=getattr(settings, "ABSA_WINDOWED", False),
+                    max_windows=getattr(settings, "ABSA_MAX_WINDOWS", 4),
+                )
+    return _pipeline
+
+
+def is_loaded():
+    return _pipeline is not None
+
+
+def warmup():
+    """Load the model and run one tiny batch so the first real request doesn't pay for it"""
+    pipeline = get_pipeline()
+    pipeline.predict_batch([("warmup", "General")])
+    return pipeline
+
+
+def __getattr__(name):
+    # Backwards compatible `from reviews.ml.absa_pipeline import absa`
+    if name == "absa":
+        return get_pipeline()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def get_aspect_sentiments(texts, aspects=None):
     if aspects is None:
@@ -133,34 +462,28 @@ def get_aspect_sentiments(texts, aspects=None):
         texts = texts[:50]
     
     aspect_scores = defaultdict(lambda: {"Positive": 0, "Negative": 0, "Neutral": 0, "count": 0})
-    
-    for text in texts:
-        if not text or not text.strip():
-            continue
-        
-        # Detect aspects in the text using keyword matching
-        detected_aspects = absa.detect_aspects(text)
-        
-        # Predict sentiment for each detected aspect
+
+    # Detect aspects for every text first, then run all (text, aspect) pairs
+    # through the model together in batches
+    texts = [text for text in texts if text and text.strip()]
+    pairs = []
+    # Detect aspects in the texts using keyword matching
+    for text, detected_aspects in zip(texts, detect_aspects_many(texts)):
         for aspect in detected_aspects:
-            try:
-                label = absa.predict_aspect_sentiment(text, aspect)
-                # Normalize label to match dictionary keys
-                if not label or label == "0":
-                    label = "Neutral"
-                else:
-                    label = str(label).strip().capitalize()
-                    # Map to expected labels
-                    if label not in ["Positive", "Negative", "Neutral"]:
-                        label = "Neutral"
-                
-                aspect_scores[aspect][label] += 1
-                aspect_scores[aspect]["count"] += 1
-            except Exception as e:
-                # If ML prediction fails, default to Neutral to avoid breaking the API
-                aspect_scores[aspect]["Neutral"] += 1
-                aspect_scores[aspect]["count"] += 1
-    
+            pairs.append((text, aspect))
+
+    from .inference import predict_labels
+
+    try:
+        labels = predict_labels(pairs)
+    except Exception as e:
+        # If ML prediction fails, default to Neutral to avoid breaking the API
+        labels = ["Neutral"] * len(pairs)
+
+    for (text, aspect), label in zip(pairs, labels):
+        aspect_scores[aspect][label] += 1
+        aspect_scores[aspect]["count"] += 1
+
     result = {}
     for aspect, scores in aspect_scores.items():
         total = scores["count"]
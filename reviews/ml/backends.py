@@ -0,0 +1,104 @@
+# reviews/ml/backends.py
+# Inference backends for ABSAPipeline. Every backend takes the tokenizer output
+# for a batch and returns a (batch, num_labels) logits tensor in the label order
+# of the checkpoint, so the pipeline's labels.csv mapping applies unchanged.
+import os
+
+BACKENDS = {}
+
+
+def register(cls):
+    BACKENDS[cls.name] = cls
+    return cls
+
+
+@register
+class TorchBackend:
+    """Plain PyTorch fp32 - the reference path"""
+    name = "torch"
+
+    def __init__(self, model_dir, device, load_model):
+        self.device = device
+        self.model = load_model(model_dir).to(device)
+        self.model.eval()
+
+    def logits(self, inputs):
+        import torch
+
+        with torch.no_grad():
+            return self.model(**inputs.to(self.device)).logits
+
+
+@register
+class TorchInt8Backend(TorchBackend):
+    """PyTorch with dynamic int8 quantization of the Linear layers (CPU only)"""
+    name = "torch-int8"
+
+    def __init__(self, model_dir, device, load_model):
+        import torch
+
+        # quantized kernels only exist on CPU
+        self.device = torch.device("cpu")
+        model = load_model(model_dir)
+        model.eval()
+        self.model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+@register
+class OnnxBackend:
+    """ONNX Runtime on CPU over a graph exported with `manage.py export_absa_onnx`"""
+    name = "onnx"
+
+    def __init__(self, model_dir, device, load_model):
+        try:
+            import onnxruntime
+        except ImportError:
+            raise RuntimeError("The 'onnx' ABSA backend needs onnxruntime (pip install onnxruntime)")
+
+        path = onnx_path(model_dir)
+        if not os.path.exists(path):
+            raise RuntimeError(f"{path} not found - run `python manage.py export_absa_onnx` first")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def logits(self, inputs):
+        import torch
+
+        feed = {name: tensor.cpu().numpy() for name, tensor in inputs.items() if name in self.input_names}
+        return torch.from_numpy(self.session.run(["logits"], feed)[0])
+
+
+def onnx_path(model_dir):
+    return os.path.join(model_dir, "model.onnx")
+
+
+def get_backend(name, model_dir, device, load_model):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown ABSA backend {name!r}, choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name](model_dir, device, load_model)
+
+
+def export_onnx(model, tokenizer, path, opset=17):
+    """Export a sequence-classification model to ONNX with dynamic batch/sequence axes"""
+    import torch
+
+    model = model.cpu().eval()
+    sample = tokenizer(["the station is clean"], ["Cleanliness"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            dynamo=False,
+        )
+    return path
@@ -0,0 +1,116 @@
+# reviews/ml/cache.py
+# Content-addressed cache in front of aspect-sentiment prediction.
+# Keys are (sha256 of the normalized text, aspect, model version); values are the
+# class probabilities. An in-process LRU sits in front of the InferenceResult table,
+# which survives restarts and is shared by every process using the same database.
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# Keys looked up per InferenceResult query, keeping the IN lists bounded
+DB_LOOKUP_CHUNK = 500
+
+
+def text_hash(text):
+    """Hash of the text with unicode and whitespace differences normalized away"""
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class InferenceCache:
+    def __init__(self, max_size=10000, persistent=True):
+        self.max_size = max_size
+        self.persistent = persistent
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def get_many(self, keys):
+        """Look up (text_hash, aspect, model_version) keys; returns {key: scores} for hits"""
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[key] = self._lru[key]
+            self.memory_hits += len(found)
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.persistent:
+            from reviews.models import InferenceResult
+
+            wanted = set(missing)
+            from_db = {}
+            for start in range(0, len(missing), DB_LOOKUP_CHUNK):
+                chunk = missing[start:start + DB_LOOKUP_CHUNK]
+                rows = InferenceResult.objects.filter(
+                    text_hash__in={h for h, _, _ in chunk},
+                    model_version__in={v for _, _, v in chunk},
+                ).values_list('text_hash', 'aspect', 'model_version', 'scores')
+                from_db.update({(h, a, v): scores for h, a, v, scores in rows if (h, a, v) in wanted})
+            found.update(from_db)
+            self._remember(from_db)
+            with self._lock:
+                self.db_hits += len(from_db)
+
+        with self._lock:
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set_many(self, items):
+        """Store {key: scores} in both tiers"""
+        if not items:
+            return
+        self._remember(items)
+        if self.persistent:
+            from reviews.models import InferenceResult
+
+            InferenceResult.objects.bulk_create(
+                [InferenceResult(text_hash=h, aspect=a, model_version=v, scores=scores)
+                 for (h, a, v), scores in items.items()],
+                ignore_conflicts=True,
+            )
+
+    def _remember(self, items):
+        with self._lock:
+            for key, scores in items.items():
+                self._lru[key] = scores
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+
+    def stats(self):
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            "memoryHits": self.memory_hits,
+            "dbHits": self.db_hits,
+            "misses": self.misses,
+            "hitRate": round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+            "size": len(self._lru),
+            "maxSize": self.max_size,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._lru.clear()
+            self.memory_hits = self.db_hits = self.misses = 0
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                from django.conf import settings
+                _cache = InferenceCache(
+                    max_size=getattr(settings, "ABSA_CACHE_SIZE", 10000),
+                    persistent=getattr(settings, "ABSA_CACHE_PERSISTENT", True),
+                )
+    return _cache
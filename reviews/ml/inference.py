@@ -0,0 +1,81 @@
+# reviews/ml/inference.py
+# Entry point for aspect-sentiment prediction used by the views and commands:
+# the result cache answers what it can and only the misses reach the model,
+# via the shared inference server when one is configured, otherwise in-process
+# (through the micro-batching scheduler when it is enabled). Bulk callers (the
+# analysis commands) skip the scheduler: their batches are already as large as
+# it would make them, and its per-request timeout is sized for web requests.
+import logging
+from functools import partial
+
+from django.conf import settings
+
+from .absa_pipeline import get_pipeline, label_for, model_version
+from .cache import get_cache, text_hash
+from .lexicon import cascade
+from .scheduler import get_scheduler
+from .server import InferenceServerError, get_client
+
+logger = logging.getLogger(__name__)
+
+
+def run_model(pairs, bulk=False):
+    """Class probabilities straight from the model (no cache)"""
+    client = get_client()
+    if client is not None:
+        try:
+            return client.predict_proba(pairs)
+        except (OSError, InferenceServerError) as e:
+            logger.warning("ABSA inference server unavailable (%s), running the model in-process", e)
+
+    if not bulk and getattr(settings, "ABSA_SCHEDULER_ENABLED", False):
+        return get_scheduler().predict(pairs, timeout=getattr(settings, "ABSA_SCHEDULER_TIMEOUT", 30))
+    return get_pipeline().predict_proba_batch(pairs)
+
+
+def predict_proba(pairs, bulk=False):
+    """Class probabilities for (text, aspect) pairs, served from the result cache where possible"""
+    pairs = list(pairs)
+    if not pairs:
+        return []
+    version = model_version()
+    keys = [(text_hash(text), aspect, version) for text, aspect in pairs]
+
+    cache = get_cache()
+    found = cache.get_many(list(dict.fromkeys(keys)))
+
+    # Run the model once per distinct missing key
+    missing = {}
+    for key, pair in zip(keys, pairs):
+        if key not in found and key not in missing:
+            missing[key] = pair
+    if missing:
+        computed = dict(zip(missing, run_model(list(missing.values()), bulk=bulk)))
+        cache.set_many(computed)
+        found.update(computed)
+
+    return [found[key] for key in keys]
+
+
+def predict_scores_with_tiers(pairs, bulk=False):
+    """(scores, tiers) for (text, aspect) pairs.
+
+    With ABSA_CASCADE on, the lexicon decides the pairs it is at least
+    ABSA_CASCADE_THRESHOLD confident about (tier "lexicon") and only the rest
+    reach the cache/model (tier "model"). `bulk` is passed on to run_model.
+    """
+    pairs = list(pairs)
+    if getattr(settings, "ABSA_CASCADE", False):
+        return cascade(pairs, getattr(settings, "ABSA_CASCADE_THRESHOLD", 0.8), partial(predict_proba, bulk=bulk))
+    return predict_proba(pairs, bulk=bulk), ["model"] * len(pairs)
+
+
+def predict_with_tiers(pairs):
+    """[(label, tier)] for (text, aspect) pairs (see predict_scores_with_tiers)"""
+    scores, tiers = predict_scores_with_tiers(pairs)
+    return [(label_for(row), tier) for row, tier in zip(scores, tiers)]
+
+
+def predict_labels(pairs):
+    """Normalized Positive / Negative / Neutral labels for (text, aspect) pairs"""
+    return [label for label, _ in predict_with_tiers(pairs)]
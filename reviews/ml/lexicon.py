@@ -0,0 +1,119 @@
+# reviews/ml/lexicon.py
+# Cheap first tier of the ABSA cascade: a negation-aware sentiment lexicon scored
+# over the clauses that mention the aspect. Pairs it is confident about skip the
+# transformer; everything else goes to the model.
+import hashlib
+import json
+import re
+
+from .absa_pipeline import KEYWORD_ASPECTS, KEYWORD_PATTERN, get_labels, normalize_label
+
+POSITIVE_WORDS = {
+    "good", "great", "excellent", "clean", "spotless", "neat", "tidy", "hygienic", "helpful", "polite",
+    "friendly", "courteous", "professional", "safe", "secure", "convenient", "efficient", "fast",
+    "quick", "punctual", "smooth", "comfortable", "nice", "amazing", "awesome", "best", "love",
+    "loved", "wonderful", "easy", "pleasant", "frequent", "organized", "organised", "superb",
+    "perfect", "beautiful", "spacious", "improved", "well-maintained", "fantastic", "reliable",
+}
+
+NEGATIVE_WORDS = {
+    "bad", "poor", "dirty", "filthy", "rude", "unsafe", "slow", "crowded", "overcrowded", "delay",
+    "delayed", "delays", "late", "broken", "worst", "terrible", "horrible", "awful", "smelly",
+    "stinks", "unhygienic", "unhelpful", "unfriendly", "congested", "chaotic", "messy", "untidy",
+    "dangerous", "harassment", "uncomfortable", "inconvenient", "difficult", "jam-packed", "packed",
+    "pathetic", "disgusting", "irregular", "inconsistent", "unprofessional", "stampede", "hate",
+    "useless", "problem", "problems", "lack", "lacking", "missing", "unclean", "unreliable",
+}
+
+NEGATORS = {
+    "not", "no", "never", "hardly", "barely", "without", "nothing", "neither", "nor",
+    "isn't", "wasn't", "aren't", "weren't", "don't", "doesn't", "didn't", "can't", "cannot", "won't",
+}
+
+INTENSIFIERS = {"very", "really", "extremely", "so", "super", "highly", "totally", "absolutely", "too"}
+
+# How many tokens back a negator still flips a sentiment word ("not very clean")
+NEGATION_WINDOW = 3
+
+_CLAUSE_SPLIT = re.compile(r"[.!?;\n]+|,?\s+\b(?:but|however|although|though|whereas)\b", re.IGNORECASE)
+_TOKEN = re.compile(r"[a-z]+(?:[-'][a-z]+)*")
+
+
+def lexicon_version():
+    return hashlib.sha1(json.dumps(
+        [sorted(POSITIVE_WORDS), sorted(NEGATIVE_WORDS), sorted(NEGATORS), sorted(INTENSIFIERS), NEGATION_WINDOW]
+    ).encode()).hexdigest()[:6]
+
+
+def _aspect_scope(text, aspect):
+    """Clauses of the text that mention one of the aspect's keywords (whole text if none do)"""
+    clauses = [c for c in _CLAUSE_SPLIT.split(text) if c and c.strip()]
+    scoped = [
+        c for c in clauses
+        if any(aspect in KEYWORD_ASPECTS[m.group(1).lower()] for m in KEYWORD_PATTERN.finditer(c))
+    ]
+    return scoped or clauses or [text]
+
+
+def lexicon_score(text, aspect):
+    """(label, confidence) for one (text, aspect) pair; confidence is 0..1"""
+    positive = negative = 0.0
+    words = 0
+    for clause in _aspect_scope(text, aspect):
+        tokens = _TOKEN.findall(clause.lower())
+        words += len(tokens)
+        for i, token in enumerate(tokens):
+            if token in POSITIVE_WORDS:
+                polarity = 1
+            elif token in NEGATIVE_WORDS:
+                polarity = -1
+            else:
+                continue
+            before = tokens[max(0, i - NEGATION_WINDOW):i]
+            if any(t in NEGATORS for t in before):
+                polarity = -polarity
+            weight = 1.5 if before and before[-1] in INTENSIFIERS else 1.0
+            if polarity > 0:
+                positive += weight
+            else:
+                negative += weight
+
+    if positive == negative:
+        return "Neutral", 0.0
+    margin = abs(positive - negative)
+    purity = margin / (positive + negative)
+    strength = 1 - 0.2 ** margin
+    # Long stretches of text hide more than a word list can see
+    coverage = min(1.0, 10 / max(words, 1)) ** 0.5
+    label = "Positive" if positive > negative else "Negative"
+    return label, round(strength * purity * coverage, 4)
+
+
+def lexicon_scores(label, confidence):
+    """Pseudo class probabilities in labels.csv order for a lexicon decision"""
+    labels = [normalize_label(l) for l in get_labels()]
+    rest = (1 - confidence) / max(len(labels) - 1, 1)
+    return [confidence if l == label else rest for l in labels]
+
+
+def cascade(pairs, threshold, model_fn):
+    """Run the lexicon first and only send pairs below `threshold` confidence to model_fn.
+
+    model_fn takes a list of pairs and returns their class probabilities.
+    Returns (scores, tiers) where tiers[i] is "lexicon" or "model".
+    """
+    pairs = list(pairs)
+    scores = [None] * len(pairs)
+    tiers = ["model"] * len(pairs)
+    undecided = []
+    for i, (text, aspect) in enumerate(pairs):
+        label, confidence = lexicon_score(text, aspect)
+        if confidence >= threshold:
+            scores[i] = lexicon_scores(label, confidence)
+            tiers[i] = "lexicon"
+        else:
+            undecided.append(i)
+    if undecided:
+        for i, row in zip(undecided, model_fn([pairs[i] for i in undecided])):
+            scores[i] = row
+    return scores, tiers
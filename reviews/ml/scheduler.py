@@ -0,0 +1,129 @@
+# reviews/ml/scheduler.py
+# Dynamic micro-batching for inference. Request threads submit their (text, aspect)
+# pairs and wait on a future; a single worker thread drains the queue, merges
+# whatever is pending (up to max_batch_size pairs, waiting at most max_wait_ms for
+# more to arrive) into one forward pass and hands each caller its slice back.
+# A job larger than max_batch_size is run on its own, in max_batch_size slices.
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+
+class _Job:
+    __slots__ = ("pairs", "future")
+
+    def __init__(self, pairs):
+        self.pairs = pairs
+        self.future = Future()
+
+
+class MicroBatchScheduler:
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._carry = None
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.pairs = 0
+
+    def submit(self, pairs):
+        """Queue pairs for the next batch; the future resolves to their class probabilities"""
+        self._ensure_worker()
+        job = _Job(list(pairs))
+        self._queue.put(job)
+        return job.future
+
+    def predict(self, pairs, timeout=None):
+        """Submit and wait; raises concurrent.futures.TimeoutError after `timeout` seconds"""
+        future = self.submit(pairs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Don't make the worker compute something nobody is waiting for
+            future.cancel()
+            raise
+
+    def _ensure_worker(self):
+        # Threads don't survive fork (e.g. gunicorn --preload), so start one per process
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                if self._pid != os.getpid():
+                    self._queue = queue.Queue()
+                    self._carry = None
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, name="absa-scheduler", daemon=True)
+                self._thread.start()
+
+    def _next_batch(self):
+        """Block for the first job, then gather more until the batch is full or max_wait passes"""
+        if self._carry is not None:
+            jobs, self._carry = [self._carry], None
+        else:
+            jobs = [self._queue.get()]
+        size = len(jobs[0].pairs)
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                job = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if size + len(job.pairs) > self.max_batch_size:
+                # Keep it for the next round rather than overflowing this one
+                self._carry = job
+                break
+            jobs.append(job)
+            size += len(job.pairs)
+        return jobs
+
+    def _run(self):
+        while True:
+            jobs = [job for job in self._next_batch() if job.future.set_running_or_notify_cancel()]
+            if not jobs:
+                continue
+            pairs = [pair for job in jobs for pair in job.pairs]
+            try:
+                # A single job can be larger than a batch; run it max_batch_size at a time
+                scores = []
+                for start in range(0, len(pairs), self.max_batch_size):
+                    scores.extend(self.predict_fn(pairs[start:start + self.max_batch_size]))
+                    self.batches += 1
+            except Exception as e:
+                for job in jobs:
+                    job.future.set_exception(e)
+                continue
+            self.pairs += len(pairs)
+            start = 0
+            for job in jobs:
+                job.future.set_result(scores[start:start + len(job.pairs)])
+                start += len(job.pairs)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                from django.conf import settings
+                from .absa_pipeline import get_pipeline
+
+                _scheduler = MicroBatchScheduler(
+                    lambda pairs: get_pipeline().predict_proba_batch(pairs),
+                    max_batch_size=getattr(settings, "ABSA_SCHEDULER_MAX_BATCH_SIZE", 32),
+                    max_wait_ms=getattr(settings, "ABSA_SCHEDULER_MAX_WAIT_MS", 5),
+                )
+    return _scheduler
@@ -0,0 +1,158 @@
+# reviews/ml/server.py
+# Out-of-process inference: one process per host (manage.py run_absa_server) owns
+# the model and serves every web worker over a Unix socket, so workers don't each
+# load DeBERTa. Requests from all connections go through one MicroBatchScheduler.
+#
+# Wire format, both directions: 4-byte big-endian length + UTF-8 JSON.
+#   request:  {"pairs": [[text, aspect], ...]}
+#   response: {"scores": [[p0, p1, p2], ...]}  or  {"error": "..."}
+import json
+import math
+import os
+import socket
+import socketserver
+import struct
+import threading
+
+_HEADER = struct.Struct(">I")
+
+
+class InferenceServerError(Exception):
+    """The inference server answered with an error or a malformed frame."""
+
+
+def batch_timeout(timeout, pairs, batch_size):
+    """`timeout` seconds for every batch_size pairs, so a bulk request gets the time it needs"""
+    return timeout * max(1, math.ceil(len(pairs) / batch_size))
+
+
+def _send(sock, payload):
+    data = json.dumps(payload).encode("utf-8")
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, size):
+    chunks = []
+    received = 0
+    while received < size:
+        chunk = sock.recv(size - received)
+        if not chunk:
+            if received:
+                raise InferenceServerError(f"truncated frame: {received} of {size} bytes")
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        received += len(chunk)
+    return b"".join(chunks)
+
+
+def _recv(sock):
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    try:
+        body = _recv_exactly(sock, size)
+    except ConnectionError:
+        raise InferenceServerError(f"truncated frame: 0 of {size} bytes")
+    return json.loads(body.decode("utf-8"))
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # Connections are persistent: serve requests until the client hangs up
+        while True:
+            try:
+                request = _recv(self.request)
+            except (ConnectionError, OSError, InferenceServerError):
+                return
+            try:
+                pairs = [(text, aspect) for text, aspect in request["pairs"]]
+                scheduler = self.server.scheduler
+                timeout = batch_timeout(self.server.timeout_s, pairs, scheduler.max_batch_size)
+                response = {"scores": scheduler.predict(pairs, timeout=timeout)}
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            try:
+                _send(self.request, response)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, scheduler, timeout_s=30):
+        self.scheduler = scheduler
+        self.timeout_s = timeout_s
+        # A socket file left behind by a previous run would make bind() fail
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, _Handler)
+
+
+class InferenceClient:
+    """Talks to run_absa_server; one persistent connection per thread.
+
+    `timeout` applies per `batch_size` pairs of a request, like the server's.
+    """
+
+    def __init__(self, path, timeout=30, batch_size=32):
+        self.path = path
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(self.path)
+        self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def predict_proba(self, pairs):
+        """Class probabilities for (text, aspect) pairs from the server"""
+        request = {"pairs": [[text, aspect] for text, aspect in pairs]}
+        for attempt in (1, 2):
+            sock = getattr(self._local, "sock", None) or self._connect()
+            sock.settimeout(batch_timeout(self.timeout, pairs, self.batch_size))
+            try:
+                _send(sock, request)
+                response = _recv(sock)
+                break
+            except InferenceServerError:
+                # The stream is out of step with the frames; don't reuse it
+                self._close()
+                raise
+            except (ConnectionError, OSError):
+                self._close()
+                # A kept-alive connection may have been dropped by a server restart; retry once
+                if attempt == 2:
+                    raise
+        if "error" in response:
+            raise InferenceServerError(response["error"])
+        return response["scores"]
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Client for settings.ABSA_SERVER_SOCKET, or None when no server is configured"""
+    global _client
+    from django.conf import settings
+
+    path = getattr(settings, "ABSA_SERVER_SOCKET", "")
+    if not path:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = InferenceClient(
+                    path,
+                    timeout=getattr(settings, "ABSA_SCHEDULER_TIMEOUT", 30),
+                    batch_size=getattr(settings, "ABSA_SCHEDULER_MAX_BATCH_SIZE", 32),
+                )
+    return _client
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 class Station(models.Model):
@@ -17,14 +17,123 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     sentiment = models.CharField(max_length=20, blank=True)  # overall sentiment
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of a station's reviews, newest first (see ReviewViewSet.list)
+            models.Index(fields=['station', '-created_at', '-id'], name='review_station_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.station.name}"
 
 
+def _delete_aspect_ratings(ratings, delete):
+    # Direct deletes of aspect ratings (admin, ORM) update StationStats here rather
+    # than through delete signals: a receiver would stop Django from fast-deleting
+    # the ratings when their review goes, which review_delta already accounts for.
+    from .stats import apply_stats_deltas, aspect_removal_deltas, is_stats_tracked
+
+    with transaction.atomic():
+        deltas = {} if is_stats_tracked() else aspect_removal_deltas(ratings)
+        result = delete()
+        if deltas:
+            apply_stats_deltas(deltas)
+    return result
+
+
+class AspectRatingQuerySet(models.QuerySet):
+    def delete(self):
+        return _delete_aspect_ratings(self, super().delete)
+
+
 class AspectRating(models.Model):
+    # model_version values that don't come from the current pipeline
+    UNVERSIONED = ''  # older rows, or the Neutral fallback when inference failed
+    IMPORTED = 'import'  # human labels from import_reviews_from_csv
+
     review = models.ForeignKey(Review, on_delete=models.CASCADE, related_name='aspects')
     aspect = models.CharField(max_length=50)
     sentiment = models.CharField(max_length=20)
+    # absa_pipeline.analysis_version() of the model + keyword dictionary that produced it
+    model_version = models.CharField(max_length=40, blank=True, db_index=True)
+    # Cascade tier that produced the sentiment: 'lexicon' or 'model' (blank for imports/fallbacks)
+    decided_by = models.CharField(max_length=10, blank=True)
+
+    objects = AspectRatingQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.aspect} - {self.sentiment}"
+
+    def delete(self, *args, **kwargs):
+        ratings = AspectRating.objects.filter(pk=self.pk)
+        return _delete_aspect_ratings(ratings, lambda: super(AspectRating, self).delete(*args, **kwargs))
+
+
+class InferenceResult(models.Model):
+    """Persistent tier of the ABSA result cache (see reviews/ml/cache.py)."""
+    text_hash = models.CharField(max_length=64)  # sha256 of the normalized review text
+    aspect = models.CharField(max_length=50)
+    model_version = models.CharField(max_length=40)
+    scores = models.JSONField()  # class probabilities in labels.csv order
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['text_hash', 'aspect', 'model_version'], name='unique_inference_result'),
+        ]
+
+    def __str__(self):
+        return f"{self.text_hash[:8]} - {self.aspect} ({self.model_version})"
+
+
+class StationStats(models.Model):
+    """Materialized aggregates behind the station stats endpoint (see reviews/stats.py).
+
+    Kept up to date incrementally in the transactions that write reviews and
+    aspect ratings; `manage.py rebuild_station_stats` recomputes it from scratch.
+    """
+    station = models.OneToOneField(Station, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_counts = models.JSONField(default=dict)  # {"1".."5": reviews}
+    sentiment_counts = models.JSONField(default=dict)  # overall review sentiment: {"Positive": reviews, ...}
+    aspect_counts = models.JSONField(default=dict)  # {aspect: {"Positive": n, "Negative": n, "Neutral": n}}
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats for {self.station_id}"
+
+
+class StationDailyRating(models.Model):
+    """Reviews per station, day and star rating (rollup maintained with StationStats)."""
+    station = models.ForeignKey(Station, on_delete=models.CASCADE, related_name='daily_ratings')
+    day = models.DateField()
+    rating = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['station', 'day', 'rating'], name='unique_station_daily_rating'),
+        ]
+
+    def __str__(self):
+        return f"{self.station_id} {self.day} {self.rating}: {self.count}"
+
+
+class StationDailyAspect(models.Model):
+    """Aspect ratings per station, review day, aspect and sentiment (rollup maintained with StationStats)."""
+    station = models.ForeignKey(Station, on_delete=models.CASCADE, related_name='daily_aspects')
+    day = models.DateField()
+    aspect = models.CharField(max_length=50)
+    sentiment = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['station', 'day', 'aspect', 'sentiment'], name='unique_station_daily_aspect'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.station_id} {self.day} {self.aspect} {self.sentiment}: {self.count}"
@@ -0,0 +1,79 @@
+# reviews/renderers.py
+# Faster response encodings. FastJSONRenderer uses orjson when it is installed
+# and DRF's stdlib encoder otherwise; MessagePackRenderer serves
+# Accept: application/msgpack (or ?format=msgpack) when msgpack is installed.
+import math
+
+from rest_framework import renderers
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+_encoder = JSONEncoder()
+
+
+def _has_nonfinite(data):
+    """Whether NaN or +-Infinity occurs anywhere in nested dicts/lists"""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(renderers.JSONRenderer):
+    """JSONRenderer with the same output, encoded by orjson when available."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Types orjson doesn't know (Decimal, lazy translations, ...) and datetimes, which
+        # DRF writes with a Z suffix and milliseconds, go through DRF's encoder
+        ret = orjson.dumps(
+            data, default=_encoder.default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+        # orjson writes NaN and Infinity as null; JSONRenderer rejects them (or writes
+        # them as is with STRICT_JSON off), so let it handle those payloads
+        if b'null' in ret and _has_nonfinite(data):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer, escape the two characters that are valid JSON but not valid JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    # Skipped during content negotiation when msgpack isn't installed
+    available = msgpack is not None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
+
+
+class AvailableRendererNegotiation(DefaultContentNegotiation):
+    """Content negotiation that ignores renderers whose optional library is missing."""
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderers = [renderer for renderer in renderers if getattr(renderer, 'available', True)]
+        return super().select_renderer(request, renderers, format_suffix)
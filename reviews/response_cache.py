@@ -0,0 +1,73 @@
+# reviews/response_cache.py
+# Cached response payloads for the per-station read endpoints (station stats and
+# the reviews list). Keys carry a per-station version that every write to the
+# station's reviews replaces once its transaction commits (stats.apply_stats_deltas
+# and rebuild_station_stats do this), so a stale entry is never read again and
+# simply expires. A version is the time.time_ns() of the write, set rather than
+# incremented: backends without an atomic incr (file, database) can't lose a bump,
+# and a version that was evicted comes back as a new value, never an old one.
+#
+# Every server process has to see the same versions, so the cache must be shared
+# between them; checks.py rejects a per-process LocMemCache.
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+
+# Version counters besides the per-station ones: ALL_STATIONS moves with every
+# station's counter (responses spanning all stations), CATALOG with the Station rows.
+ALL_STATIONS = 'all'
+CATALOG = 'catalog'
+
+
+def _version_key(station_id):
+    return f'station-version:{station_id}'
+
+
+def station_version(station_id):
+    key = _version_key(station_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_station_versions(station_ids):
+    version = time.time_ns()
+    cache.set_many({_version_key(station_id): version for station_id in set(station_ids)}, timeout=None)
+
+
+def invalidate_stations(station_ids):
+    """Drop the stations' cached responses once the current transaction commits"""
+    station_ids = list(station_ids)
+    if station_ids:
+        transaction.on_commit(lambda: bump_station_versions([*station_ids, ALL_STATIONS]))
+
+
+def invalidate_catalog():
+    """Mark the station list changed once the current transaction commits"""
+    transaction.on_commit(lambda: bump_station_versions([CATALOG]))
+
+
+def cached_response(name, station_id, params, view):
+    """view()'s Response, served from the cache while the station is unchanged.
+
+    `params` identify the variant of the response (query parameters, the date for
+    date-dependent payloads). Only 200 responses are stored.
+    """
+    if not getattr(settings, 'RESPONSE_CACHE_ENABLED', True):
+        return view()
+    variant = hashlib.md5(repr(sorted(params)).encode()).hexdigest()
+    key = f'response:{name}:{station_id}:{station_version(station_id)}:{variant}'
+    data = cache.get(key)
+    if data is not None:
+        return Response(data)
+    response = view()
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 60 * 60))
+    return response
@@ -1,12 +1,38 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from .models import Station, Review, AspectRating
 
+def requested_fields(request):
+    """Field names from ?fields=a,b,c (sparse fieldsets), or None for all fields"""
+    fields = request.query_params.get('fields') if request is not None else None
+    if not fields:
+        return None
+    return [name.strip() for name in fields.split(',') if name.strip()]
+
+
+class SparseFieldsMixin:
+    """Drops the fields not listed in the request's ?fields= parameter.
+
+    Reads only: on writes every field still has to be validated.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        fields = requested_fields(request)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
 class AspectRatingSerializer(serializers.ModelSerializer):
     class Meta:
         model = AspectRating
         fields = ['id', 'aspect', 'sentiment']
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     aspects = AspectRatingSerializer(many=True, read_only=True)
     user = serializers.StringRelatedField(read_only=True)
 
@@ -14,7 +40,64 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ['id', 'user', 'station', 'text', 'rating', 'sentiment', 'created_at', 'aspects']  # <-- include rating
 
-class StationSerializer(serializers.ModelSerializer):
+class ReviewReadSerializer:
+    """Fast read-only equivalent of ReviewSerializer(many=True).
+
+    Produces the same JSON from values() rows plus one query for all their
+    aspects, without instantiating models or running per-field serializers.
+    Takes a Review queryset, or rows already fetched with ReviewReadSerializer.values().
+    `fields` limits the output to those fields (see requested_fields).
+    """
+    # Output field -> values() column; 'aspects' comes from its own query
+    COLUMNS = {
+        'id': 'id',
+        'user': 'user__username',
+        'station': 'station_id',
+        'text': 'text',
+        'rating': 'rating',
+        'sentiment': 'sentiment',
+        'created_at': 'created_at',
+    }
+    FIELDS = ['id', 'user', 'station', 'text', 'rating', 'sentiment', 'created_at', 'aspects']
+
+    def __init__(self, rows, fields=None):
+        self.rows = rows
+        self.fields = [name for name in self.FIELDS if fields is None or name in fields]
+
+    @classmethod
+    def values(cls, queryset, fields=None):
+        # id and created_at are always fetched: aspects and pagination cursors need them
+        columns = [
+            column for name, column in cls.COLUMNS.items()
+            if fields is None or name in fields or name in ('id', 'created_at')
+        ]
+        return queryset.values(*columns)
+
+    @property
+    def data(self):
+        rows = self.rows
+        if not isinstance(rows, (list, tuple)):
+            rows = list(self.values(rows, self.fields))
+        aspects = None
+        if 'aspects' in self.fields:
+            aspects = {row['id']: [] for row in rows}
+            for aspect in AspectRating.objects.filter(review_id__in=list(aspects)).values(
+                'id', 'review_id', 'aspect', 'sentiment'
+            ).order_by('id'):
+                aspects[aspect.pop('review_id')].append(aspect)
+        created_at = serializers.DateTimeField()
+        columns = [(name, self.COLUMNS[name]) for name in self.fields if name in self.COLUMNS]
+        data = []
+        for row in rows:
+            item = {name: row[column] for name, column in columns}
+            if 'created_at' in item:
+                item['created_at'] = created_at.to_representation(item['created_at'])
+            if aspects is not None:
+                item['aspects'] = aspects[row['id']]
+            data.append(item)
+        return data
+
+class StationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Station
         fields = ['id', 'name', 'line', 'location']
@@ -0,0 +1,94 @@
+# reviews/signals.py
+# Station rows change through the admin and the maintenance commands; any save or
+# delete moves the catalog version behind the stations endpoint's ETag, and a
+# deleted station's cached stats and review pages go with it.
+#
+# Reviews and aspect ratings written outside the code paths that keep StationStats
+# up to date themselves (admin edits, ORM deletes, cascades from deleting a user)
+# are turned into stats deltas here. Those code paths run inside stats_tracked(),
+# which these receivers skip. Deleting aspect ratings directly is accounted for in
+# AspectRatingQuerySet.delete (models.py), so their cascades stay fast deletes.
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .models import AspectRating, Review, Station
+from .response_cache import invalidate_catalog, invalidate_stations
+from .stats import StatsDelta, apply_stats_deltas, is_stats_tracked, review_day, review_delta
+
+
+def _deleted_from(origin, model):
+    """Whether a delete was started on `model` rows (an instance or a queryset of them)"""
+    return isinstance(origin, model) or getattr(origin, 'model', None) is model
+
+
+@receiver(post_save, sender=Station)
+def station_saved(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(post_delete, sender=Station)
+def station_deleted(sender, instance, **kwargs):
+    invalidate_catalog()
+    invalidate_stations([instance.pk])
+
+
+@receiver(pre_save, sender=Review)
+def review_saving(sender, instance, raw=False, **kwargs):
+    if raw or is_stats_tracked() or instance.pk is None:
+        return
+    old = Review.objects.filter(pk=instance.pk).first()
+    if old is not None:
+        instance._stats_removed = (old.station_id, review_delta(old, sign=-1))
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, raw=False, **kwargs):
+    if raw or is_stats_tracked():
+        return
+    deltas = [getattr(instance, '_stats_removed', None), (instance.station_id, review_delta(instance))]
+    instance._stats_removed = None
+    for station_id, delta in filter(None, deltas):
+        apply_stats_deltas({station_id: delta})
+
+
+@receiver(pre_delete, sender=Review)
+def review_deleting(sender, instance, origin=None, **kwargs):
+    # A deleted station's stats row goes with it; otherwise remove the review and
+    # all its aspect ratings (deleted along with it) in one delta
+    skip = is_stats_tracked() or _deleted_from(origin, Station)
+    instance._stats_removed = None if skip else (instance.station_id, review_delta(instance, sign=-1))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    # Applied once the row is gone: a stats row created here is built from the tables
+    removed = getattr(instance, '_stats_removed', None)
+    instance._stats_removed = None
+    if removed is not None:
+        apply_stats_deltas({removed[0]: removed[1]})
+
+
+def _aspect_delta(aspect, sign):
+    review = Review.objects.only('station_id', 'created_at').get(pk=aspect.review_id)
+    delta = StatsDelta()
+    delta.add_aspect(aspect.aspect, aspect.sentiment, sign, day=review_day(review))
+    return review.station_id, delta
+
+
+@receiver(pre_save, sender=AspectRating)
+def aspect_saving(sender, instance, raw=False, **kwargs):
+    if raw or is_stats_tracked() or instance.pk is None:
+        return
+    old = AspectRating.objects.filter(pk=instance.pk).first()
+    if old is not None:
+        instance._stats_removed = _aspect_delta(old, -1)
+
+
+@receiver(post_save, sender=AspectRating)
+def aspect_saved(sender, instance, raw=False, **kwargs):
+    if raw or is_stats_tracked():
+        return
+    deltas = [getattr(instance, '_stats_removed', None), _aspect_delta(instance, 1)]
+    instance._stats_removed = None
+    for station_id, delta in filter(None, deltas):
+        apply_stats_deltas({station_id: delta})
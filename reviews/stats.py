@@ -0,0 +1,457 @@
+# reviews/stats.py
+# Incremental maintenance of StationStats and the daily rollups
+# (StationDailyRating, StationDailyAspect). Writers describe what they changed as
+# a StatsDelta per station and call apply_stats_deltas() inside the same
+# transaction, after their own rows are written. A station without a stats row
+# yet gets it (and its rollups) built from the tables instead, which then already
+# include the change. Stations that had a row before the rollups existed get them
+# from migration 0007, so deploying this over existing data needs no manual step.
+# Writes that don't go through such a writer (admin edits, ORM deletes, cascades
+# from deleting a user) are accounted for by the model signals in signals.py and,
+# for deleted aspect ratings, AspectRatingQuerySet.delete; writers that do their
+# own accounting run inside stats_tracked() to skip them.
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import AspectRating, Review, Station, StationDailyAspect, StationDailyRating, StationStats
+from .response_cache import invalidate_stations
+
+SENTIMENTS = ("Positive", "Negative", "Neutral")
+
+# Aspect trend: net sentiment ((positive - negative) / mentions) over the last
+# TREND_WINDOW_DAYS days against the window before it. Moves smaller than
+# TREND_THRESHOLD, or windows with fewer than TREND_MIN_MENTIONS, are "stable".
+TREND_WINDOW_DAYS = 30
+TREND_THRESHOLD = 0.1
+TREND_MIN_MENTIONS = 3
+
+GRANULARITIES = ("day", "week", "month")
+# Longest from..to range a time series may span (every period is zero-filled)
+TIMESERIES_MAX_DAYS = 731
+# Most station IDs one bulk stats request (?ids=) may list
+BULK_STATS_MAX_IDS = 500
+
+# Stations need at least this many mentions of an aspect to be ranked on it
+RANKING_MIN_MENTIONS = 5
+
+
+_local = threading.local()
+
+
+@contextmanager
+def stats_tracked():
+    """Mark the writes in this block as accounted for by the caller (deltas or a rebuild)"""
+    _local.tracked = getattr(_local, 'tracked', 0) + 1
+    try:
+        yield
+    finally:
+        _local.tracked -= 1
+
+
+def is_stats_tracked():
+    return getattr(_local, 'tracked', 0) > 0
+
+
+def normalize_sentiment(sentiment):
+    sentiment = (sentiment or "").capitalize()
+    return sentiment if sentiment in SENTIMENTS else "Neutral"
+
+
+def review_day(review):
+    """Local calendar day a review was written on (the rollups' day)"""
+    return _local_day(review.created_at)
+
+
+def day_start(day):
+    """Aware datetime of the local midnight starting `day`, for filtering created_at without a date cast"""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _local_day(created_at):
+    if timezone.is_naive(created_at):
+        return created_at.date()
+    return timezone.localdate(created_at)
+
+
+class StatsDelta:
+    """Changes to one station's aggregates; `day` (the review's day) feeds the daily rollups"""
+
+    def __init__(self):
+        self.reviews = 0
+        self.rating_sum = 0
+        self.ratings = Counter()
+        self.sentiments = Counter()
+        self.aspects = defaultdict(Counter)
+        self.daily_ratings = Counter()
+        self.daily_aspects = Counter()
+
+    def add_review(self, rating, sentiment='', sign=1, day=None):
+        self.reviews += sign
+        self.rating_sum += sign * rating
+        self.ratings[str(rating)] += sign
+        self.add_sentiment(sentiment, sign)
+        if day is not None:
+            self.daily_ratings[(day, rating)] += sign
+
+    def add_sentiment(self, sentiment, sign=1):
+        # Blank means "not analyzed yet" and isn't counted
+        if sentiment:
+            self.sentiments[normalize_sentiment(sentiment)] += sign
+
+    def add_aspect(self, aspect, sentiment, sign=1, day=None):
+        sentiment = normalize_sentiment(sentiment)
+        self.aspects[aspect][sentiment] += sign
+        if day is not None:
+            self.daily_aspects[(day, aspect, sentiment)] += sign
+
+
+def _merge(counts, delta):
+    """Add Counter `delta` into JSON dict `counts`, dropping keys that reach zero"""
+    for key, n in delta.items():
+        total = counts.get(key, 0) + n
+        if total:
+            counts[key] = total
+        else:
+            counts.pop(key, None)
+
+
+def apply_stats_deltas(deltas):
+    """Apply {station_id: StatsDelta}; call inside the transaction that made the changes"""
+    with transaction.atomic():
+        # Lock rows in a fixed order so concurrent writers can't deadlock. The
+        # StationStats lock also serializes writes to the station's rollup rows.
+        for station_id in sorted(deltas):
+            delta = deltas[station_id]
+            stats, created = StationStats.objects.select_for_update().get_or_create(station_id=station_id)
+            if created:
+                _fill(stats)
+                stats.save()
+                _fill_rollups(station_id)
+                continue
+            stats.review_count += delta.reviews
+            stats.rating_sum += delta.rating_sum
+            _merge(stats.rating_counts, delta.ratings)
+            _merge(stats.sentiment_counts, delta.sentiments)
+            for aspect, counts in delta.aspects.items():
+                aspect_counts = stats.aspect_counts.setdefault(aspect, {})
+                _merge(aspect_counts, counts)
+                if not aspect_counts:
+                    del stats.aspect_counts[aspect]
+            stats.save()
+            _apply_rollups(station_id, delta)
+        invalidate_stations(deltas)
+
+
+def _bump(model, n, **key):
+    """Add n to the count of the rollup row identified by `key`, creating it if needed"""
+    if not model.objects.filter(**key).update(count=F('count') + n) and n > 0:
+        model.objects.create(count=n, **key)
+
+
+def _apply_rollups(station_id, delta):
+    for (day, rating), n in delta.daily_ratings.items():
+        if n:
+            _bump(StationDailyRating, n, station_id=station_id, day=day, rating=rating)
+    for (day, aspect, sentiment), n in delta.daily_aspects.items():
+        if n:
+            _bump(StationDailyAspect, n, station_id=station_id, day=day, aspect=aspect, sentiment=sentiment)
+    # Drop rows whose count went back to zero
+    if any(n < 0 for n in delta.daily_ratings.values()):
+        StationDailyRating.objects.filter(station_id=station_id, count__lte=0).delete()
+    if any(n < 0 for n in delta.daily_aspects.values()):
+        StationDailyAspect.objects.filter(station_id=station_id, count__lte=0).delete()
+
+
+def _fill(stats):
+    """Compute a station's aggregates from the review and aspect tables"""
+    reviews = Review.objects.filter(station_id=stats.station_id)
+    totals = reviews.aggregate(n=Count('id'), rating_sum=Sum('rating'))
+    stats.review_count = totals['n']
+    stats.rating_sum = totals['rating_sum'] or 0
+    stats.rating_counts = {
+        str(row['rating']): row['n'] for row in reviews.values('rating').annotate(n=Count('id')).order_by()
+    }
+    delta = StatsDelta()
+    for row in reviews.exclude(sentiment='').values('sentiment').annotate(n=Count('id')).order_by():
+        delta.add_sentiment(row['sentiment'], row['n'])
+    stats.sentiment_counts = dict(delta.sentiments)
+    ratings = AspectRating.objects.filter(review__station_id=stats.station_id)
+    for row in ratings.values('aspect', 'sentiment').annotate(n=Count('id')).order_by():
+        delta.add_aspect(row['aspect'], row['sentiment'], row['n'])
+    stats.aspect_counts = {aspect: dict(counts) for aspect, counts in delta.aspects.items()}
+
+
+def _fill_rollups(station_id):
+    """Recompute a station's daily rollup rows from the review and aspect tables"""
+    StationDailyRating.objects.filter(station_id=station_id).delete()
+    StationDailyAspect.objects.filter(station_id=station_id).delete()
+    delta = StatsDelta()
+    reviews = Review.objects.filter(station_id=station_id).annotate(day=TruncDate('created_at'))
+    for row in reviews.values('day', 'rating').annotate(n=Count('id')).order_by():
+        delta.daily_ratings[(row['day'], row['rating'])] += row['n']
+    ratings = AspectRating.objects.filter(review__station_id=station_id).annotate(day=TruncDate('review__created_at'))
+    for row in ratings.values('day', 'aspect', 'sentiment').annotate(n=Count('id')).order_by():
+        delta.add_aspect(row['aspect'], row['sentiment'], row['n'], day=row['day'])
+    StationDailyRating.objects.bulk_create([
+        StationDailyRating(station_id=station_id, day=day, rating=rating, count=n)
+        for (day, rating), n in delta.daily_ratings.items()
+    ], batch_size=1000)
+    StationDailyAspect.objects.bulk_create([
+        StationDailyAspect(station_id=station_id, day=day, aspect=aspect, sentiment=sentiment, count=n)
+        for (day, aspect, sentiment), n in delta.daily_aspects.items()
+    ], batch_size=1000)
+
+
+def get_station_stats(station_id):
+    """The station's StationStats row, built on first use (unsaved and empty for unknown stations)"""
+    stats = StationStats.objects.filter(station_id=station_id).first()
+    if stats is None:
+        if not Station.objects.filter(pk=station_id).exists():
+            return StationStats(station_id=station_id)
+        apply_stats_deltas({station_id: StatsDelta()})
+        stats = StationStats.objects.get(station_id=station_id)
+    return stats
+
+
+def get_stations_stats(station_ids):
+    """{station_id: StationStats} for existing stations, building missing rows on first use"""
+    stats = {row.station_id: row for row in StationStats.objects.filter(station_id__in=station_ids)}
+    missing = [station_id for station_id in station_ids if station_id not in stats]
+    if missing:
+        apply_stats_deltas({station_id: StatsDelta() for station_id in missing})
+        stats.update((row.station_id, row) for row in StationStats.objects.filter(station_id__in=missing))
+    return stats
+
+
+def combine_stats(rows):
+    """Sum StationStats rows (e.g. all stations of a line) into one unsaved StationStats"""
+    combined = StationStats()
+    for row in rows:
+        combined.review_count += row.review_count
+        combined.rating_sum += row.rating_sum
+        _merge(combined.rating_counts, row.rating_counts)
+        _merge(combined.sentiment_counts, row.sentiment_counts)
+        for aspect, counts in row.aspect_counts.items():
+            _merge(combined.aspect_counts.setdefault(aspect, {}), counts)
+    return combined
+
+
+def aspect_rankings(stats_by_station, k):
+    """{aspect: top-k [(station_id, positive share, mentions)]} by share of positive mentions"""
+    rankings = defaultdict(list)
+    for station_id, stats in stats_by_station.items():
+        for aspect, counts in stats.aspect_counts.items():
+            mentions = sum(counts.values())
+            if mentions >= RANKING_MIN_MENTIONS:
+                rankings[aspect].append((station_id, counts.get("Positive", 0) / mentions, mentions))
+    return {
+        aspect: sorted(ranked, key=lambda r: (-r[1], -r[2], r[0]))[:k]
+        for aspect, ranked in sorted(rankings.items())
+    }
+
+
+def rebuild_station_stats(station_ids=None, aggregates=True, rollups=True):
+    """Recompute StationStats and/or the daily rollups from scratch for the given stations (all by default)"""
+    stations = Station.objects.order_by('id')
+    if station_ids is not None:
+        stations = stations.filter(id__in=station_ids)
+    count = 0
+    for station_id in stations.values_list('id', flat=True):
+        with transaction.atomic():
+            stats, _ = StationStats.objects.select_for_update().get_or_create(station_id=station_id)
+            if aggregates:
+                _fill(stats)
+                stats.save()
+            if rollups:
+                _fill_rollups(station_id)
+            invalidate_stations([station_id])
+        count += 1
+    return count
+
+
+def review_added(review):
+    """Count a newly created review"""
+    delta = StatsDelta()
+    delta.add_review(review.rating, review.sentiment, day=review_day(review))
+    apply_stats_deltas({review.station_id: delta})
+
+
+def review_delta(review, sign=1):
+    """Delta that adds (sign=1) or removes (sign=-1) a saved review and its aspect ratings"""
+    delta = StatsDelta()
+    day = review_day(review)
+    delta.add_review(review.rating, review.sentiment, sign=sign, day=day)
+    for row in review.aspects.values('aspect', 'sentiment').annotate(n=Count('id')).order_by():
+        delta.add_aspect(row['aspect'], row['sentiment'], sign * row['n'], day=day)
+    return delta
+
+
+def review_removal_delta(review):
+    """Delta that removes a review and its aspect ratings; build it before deleting the review"""
+    return review_delta(review, sign=-1)
+
+
+def aspect_removal_deltas(ratings):
+    """{station_id: StatsDelta} removing the AspectRating rows of a queryset; build it before deleting them"""
+    deltas = defaultdict(StatsDelta)
+    rows = ratings.values('review__station_id', 'review__created_at', 'aspect', 'sentiment').annotate(
+        n=Count('id')
+    ).order_by()
+    for row in rows:
+        deltas[row['review__station_id']].add_aspect(
+            row['aspect'], row['sentiment'], -row['n'], day=_local_day(row['review__created_at'])
+        )
+    return dict(deltas)
+
+
+def month_starts(today=None):
+    """(first day of this month, first day of last month)"""
+    today = today or timezone.localdate()
+    this_month = today.replace(day=1)
+    return this_month, (this_month - timedelta(days=1)).replace(day=1)
+
+
+def month_counts(station_id, today=None):
+    """(reviews this calendar month, reviews last calendar month) from the daily rollup"""
+    return month_counts_many([station_id], today)[station_id]
+
+
+def month_counts_many(station_ids, today=None):
+    """{station_id: (this month, last month)} for many stations in one grouped query"""
+    this_month, last_month = month_starts(today)
+    rows = StationDailyRating.objects.filter(station_id__in=station_ids, day__gte=last_month).values(
+        'station_id'
+    ).annotate(
+        this_month=Sum('count', filter=Q(day__gte=this_month)),
+        last_month=Sum('count', filter=Q(day__lt=this_month)),
+    ).order_by()
+    counts = {station_id: (0, 0) for station_id in station_ids}
+    for row in rows:
+        counts[row['station_id']] = (row['this_month'] or 0, row['last_month'] or 0)
+    return counts
+
+
+def trend_windows(today=None):
+    """(start of the previous window, start of the recent window) for aspect trends"""
+    today = today or timezone.localdate()
+    recent = today - timedelta(days=TREND_WINDOW_DAYS - 1)
+    return recent - timedelta(days=TREND_WINDOW_DAYS), recent
+
+
+def trend_direction(recent, prior):
+    """"up" / "down" / "stable" from two {"Positive": n, "Negative": n, "total": n} windows"""
+    if recent["total"] < TREND_MIN_MENTIONS or prior["total"] < TREND_MIN_MENTIONS:
+        return "stable"
+
+    def net(window):
+        return (window["Positive"] - window["Negative"]) / window["total"]
+    change = net(recent) - net(prior)
+    if change >= TREND_THRESHOLD:
+        return "up"
+    if change <= -TREND_THRESHOLD:
+        return "down"
+    return "stable"
+
+
+def aspect_trends(station_id, today=None):
+    """{aspect: "up" / "down" / "stable"} from the daily aspect rollup"""
+    return aspect_trends_many([station_id], today)[station_id]
+
+
+def aspect_trends_many(station_ids, today=None, group_by='station_id'):
+    """{station_id: {aspect: trend}} for many stations in one grouped query.
+
+    With group_by='station__line' the stations' mentions are pooled per line instead.
+    """
+    prior_start, recent_start = trend_windows(today)
+    rows = StationDailyAspect.objects.filter(station_id__in=station_ids, day__gte=prior_start).values(
+        group_by, 'aspect'
+    ).annotate(
+        recent_total=Sum('count', filter=Q(day__gte=recent_start)),
+        recent_positive=Sum('count', filter=Q(day__gte=recent_start, sentiment='Positive')),
+        recent_negative=Sum('count', filter=Q(day__gte=recent_start, sentiment='Negative')),
+        prior_total=Sum('count', filter=Q(day__lt=recent_start)),
+        prior_positive=Sum('count', filter=Q(day__lt=recent_start, sentiment='Positive')),
+        prior_negative=Sum('count', filter=Q(day__lt=recent_start, sentiment='Negative')),
+    ).order_by()
+    trends = defaultdict(dict) if group_by != 'station_id' else {station_id: {} for station_id in station_ids}
+    for row in rows:
+        trends[row[group_by]][row['aspect']] = trend_from_row(row)
+    return trends
+
+
+def trend_from_row(row):
+    """trend_direction for a row of recent_/prior_ total/positive/negative sums"""
+    def window(prefix):
+        return {
+            "Positive": row[f'{prefix}_positive'] or 0,
+            "Negative": row[f'{prefix}_negative'] or 0,
+            "total": row[f'{prefix}_total'] or 0,
+        }
+    return trend_direction(window('recent'), window('prior'))
+
+
+def _period_starts(start, end, granularity):
+    if granularity == "week":
+        start -= timedelta(days=start.weekday())
+    elif granularity == "month":
+        start = start.replace(day=1)
+    period = start
+    while period <= end:
+        yield period
+        if granularity == "day":
+            period += timedelta(days=1)
+        elif granularity == "week":
+            period += timedelta(days=7)
+        else:
+            period = (period.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def station_timeseries(station_id, start, end, granularity="day"):
+    """Per-period review counts, ratings and aspect sentiments between two dates (inclusive).
+
+    Reads only the daily rollups, so the cost depends on the number of days,
+    not the number of reviews. Periods without reviews are included with zeros.
+    """
+    trunc = {"day": F('day'), "week": TruncWeek('day'), "month": TruncMonth('day')}[granularity]
+    series = {
+        period: {"reviews": 0, "ratingSum": 0, "ratings": {}, "aspects": {}}
+        for period in _period_starts(start, end, granularity)
+    }
+
+    ratings = StationDailyRating.objects.filter(station_id=station_id, day__range=(start, end))
+    for row in ratings.annotate(period=trunc).values('period', 'rating').annotate(n=Sum('count')).order_by():
+        entry = series[_as_date(row['period'])]
+        entry["reviews"] += row['n']
+        entry["ratingSum"] += row['rating'] * row['n']
+        entry["ratings"][row['rating']] = row['n']
+
+    aspects = StationDailyAspect.objects.filter(station_id=station_id, day__range=(start, end))
+    for row in aspects.annotate(period=trunc).values('period', 'aspect', 'sentiment').annotate(n=Sum('count')).order_by():
+        counts = series[_as_date(row['period'])]["aspects"].setdefault(
+            row['aspect'], {sentiment: 0 for sentiment in SENTIMENTS}
+        )
+        counts[row['sentiment']] += row['n']
+
+    return [
+        {
+            "period": period.isoformat(),
+            "reviews": entry["reviews"],
+            "averageRating": entry["ratingSum"] / entry["reviews"] if entry["reviews"] else None,
+            "ratings": entry["ratings"],
+            "aspects": entry["aspects"],
+        }
+        for period, entry in series.items()
+    ]
+
+
+def _as_date(value):
+    # Truncating a DateField gives dates, but some backends return datetimes
+    return value.date() if isinstance(value, datetime) else value
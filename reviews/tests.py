@@ -1,3 +1,841 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import socket
+import struct
+import tempfile
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.deletion import Collector
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .ml import absa_pipeline
+from .ml.absa_pipeline import (
+    analysis_version, checkpoint_fingerprint, detect_aspects, detect_aspects_many, label_for, overall_label,
+)
+from .ml.inference import run_model
+from .ml.lexicon import cascade, lexicon_score
+from .ml.scheduler import MicroBatchScheduler
+from .ml.server import InferenceClient, InferenceServer, InferenceServerError, batch_timeout
+from .models import AspectRating, Review, Station
+from .renderers import FastJSONRenderer, msgpack
+from .serializers import ReviewReadSerializer, ReviewSerializer
+from .checks import response_cache_is_shared
+from .models import StationDailyAspect, StationDailyRating, StationStats
+from .stats import BULK_STATS_MAX_IDS, RANKING_MIN_MENTIONS, rebuild_station_stats
+from .views import analyze_reviews_aspects, stale_reviews, store_reviews_aspects
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CachedTestCase(TestCase):
+    """A private cache, emptied before every test, instead of the shared one the server uses"""
+
+    def setUp(self):
+        cache.clear()
+
+
+class ReviewListQueryTests(CachedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.station = Station.objects.create(name='Andheri')
+        user = User.objects.create(username='rider')
+        reviews = Review.objects.bulk_create(
+            [Review(user=user, station=cls.station, text=f'Review {i}', rating=i % 5 + 1) for i in range(30)]
+        )
+        AspectRating.objects.bulk_create(
+            [
+                AspectRating(review=review, aspect=aspect, sentiment='Positive')
+                for review in reviews
+                for aspect in ('Cleanliness', 'Staff behavior')
+            ]
+        )
+        rebuild_station_stats([cls.station.id])
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_page_of_twenty_is_constant_queries(self):
+        # reviews, their aspects, and the station's counter row, plus the
+        # newest review for Last-Modified once per station version
+        with self.assertNumQueries(4):
+            response = self.client.get(f'/api/reviews/?station={self.station.id}&limit=20')
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertTrue(all(len(review['aspects']) == 2 for review in response.data['results']))
+
+        with self.assertNumQueries(3):
+            self.client.get(response.data['next'].replace('?', '/api/reviews/?', 1))
+
+    def test_retrieve_prefetches_aspects(self):
+        review = Review.objects.first()
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/reviews/{review.id}/')
+        self.assertEqual(len(response.data['aspects']), 2)
+
+    def test_read_serializer_matches_model_serializer(self):
+        reviews = Review.objects.order_by('-created_at', '-id')
+        self.assertEqual(
+            ReviewReadSerializer(reviews).data,
+            [dict(review) for review in ReviewSerializer(reviews, many=True).data],
+        )
+
+
+class RendererTests(CachedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.station = Station.objects.create(name='Andheri', line='Line 1')
+        user = User.objects.create(username='rider')
+        review = Review.objects.create(user=user, station=cls.station, text='Clean   station', rating=4)
+        AspectRating.objects.create(review=review, aspect='Cleanliness', sentiment='Positive')
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_fast_json_matches_stdlib(self):
+        data = ReviewReadSerializer(Review.objects.all()).data
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_fast_json_matches_stdlib_for_datetimes_and_nonfinite_floats(self):
+        moment = datetime(2026, 3, 1, 8, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        data = {'at': moment, 'day': moment.date(), 'time': moment.time(), 'naive': moment.replace(tzinfo=None)}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertIn(b'"2026-03-01T08:30:15.123456Z"', FastJSONRenderer().render(data))
+        for value in [float('nan'), float('inf')]:
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({'rating': value, 'next': None})
+            # STRICT_JSON off
+            fast, stdlib = FastJSONRenderer(), JSONRenderer()
+            fast.strict = stdlib.strict = False
+            self.assertEqual(fast.render([value]), stdlib.render([value]))
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(f'/api/reviews/?station={self.station.id}&limit=20&fields=id,text')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'text'])
+        response = self.client.get(f'/api/reviews/?station={self.station.id}&fields=id,rating')
+        self.assertEqual(list(response.data[0]), ['id', 'rating'])
+        response = self.client.get('/api/stations/?fields=name')
+        self.assertEqual(list(response.data[0]), ['name'])
+
+    @mock.patch('reviews.views.analyze_review_aspects')
+    def test_fields_do_not_skip_validation_on_writes(self, analyze):
+        response = self.client.post('/api/reviews/?fields=id', {'text': 'No station'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('station', response.data)
+        response = self.client.post(
+            '/api/reviews/?fields=id', {'station': self.station.id, 'text': 'Fine', 'rating': 4}
+        )
+        self.assertEqual(response.status_code, 201)
+
+    @skipIf(msgpack is None, 'msgpack is not installed')
+    def test_msgpack_by_accept_header(self):
+        response = self.client.get(f'/api/stations/{self.station.id}/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content)['name'], 'Andheri')
+
+
+class StationExportTests(CachedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.station = Station.objects.create(name='Andheri')
+        user = User.objects.create(username='rider')
+        reviews = Review.objects.bulk_create(
+            [Review(user=user, station=cls.station, text=f'Review, "{i}"', rating=3) for i in range(5)]
+        )
+        AspectRating.objects.create(review=reviews[0], aspect='Cleanliness', sentiment='Negative')
+
+    def test_ndjson_export_joins_aspects(self):
+        response = self.client.get(f'/api/stations/{self.station.id}/export/')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            ReviewReadSerializer(Review.objects.order_by('created_at', 'id')).data,
+        )
+
+    def test_csv_export(self):
+        response = self.client.get(f'/api/stations/{self.station.id}/export/?format=csv')
+        rows = list(csv.reader(b''.join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][-1], 'aspects')
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][3], 'Review, "0"')
+        self.assertEqual(rows[1][-1], 'Cleanliness=Negative')
+
+    def test_unknown_format_and_station(self):
+        self.assertEqual(self.client.get(f'/api/stations/{self.station.id}/export/?format=xml').status_code, 400)
+        self.assertEqual(self.client.get('/api/stations/0/export/').status_code, 404)
+
+
+class ResponseCacheTests(CachedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.station = Station.objects.create(name='Andheri')
+        cls.user = User.objects.create(username='rider', is_staff=True)
+        Review.objects.create(user=cls.user, station=cls.station, text='Fine', rating=4)
+        rebuild_station_stats([cls.station.id])
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def test_repeat_reads_are_served_from_cache(self):
+        urls = [f'/api/stations/{self.station.id}/stats/', f'/api/reviews/?station={self.station.id}&limit=20']
+        for url in urls:
+            first = self.client.get(url).data
+            with self.assertNumQueries(0):
+                self.assertEqual(self.client.get(url).data, first)
+
+    def test_writes_invalidate(self):
+        stats_url = f'/api/stations/{self.station.id}/stats/'
+        reviews_url = f'/api/reviews/?station={self.station.id}&limit=20'
+        self.client.get(stats_url)
+        self.client.get(reviews_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review = Review.objects.create(user=self.user, station=self.station, text='Great', rating=2)
+        self.assertEqual(self.client.get(stats_url).data['totalReviews'], 2)
+        self.assertEqual(len(self.client.get(reviews_url).data['results']), 2)
+
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/reviews/{review.id}/', {'rating': 5})
+        self.assertEqual(self.client.get(stats_url).data['overallRating'], 4.5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(f'/api/reviews/{review.id}/')
+        self.assertEqual(self.client.get(stats_url).data['totalReviews'], 1)
+        self.assertEqual(len(self.client.get(reviews_url).data['results']), 1)
+
+
+class LastModifiedTests(CachedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.station = Station.objects.create(name='Andheri')
+        user = User.objects.create(username='rider')
+        cls.older = Review.objects.create(user=user, station=cls.station, text='Fine', rating=4)
+        cls.newer = Review.objects.create(user=user, station=cls.station, text='Great', rating=5)
+
+    def test_writes_other_than_new_reviews_move_last_modified(self):
+        url = f'/api/reviews/?station={self.station.id}'
+
+        def reanalyze():
+            AspectRating.objects.create(review=self.older, aspect='Cleanliness', sentiment='Negative')
+
+        def edit():
+            self.older.rating = 1
+            self.older.save()
+
+        def delete():
+            Review.objects.get(pk=self.newer.pk).delete()
+
+        later = time.time_ns()
+        for write in (reanalyze, edit, delete):
+            last_modified = self.client.get(url)['Last-Modified']
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+            # Writes a few seconds later, since Last-Modified has one-second resolution
+            later += 5 * 10 ** 9
+            with mock.patch('reviews.response_cache.time.time_ns', return_value=later):
+                with self.captureOnCommitCallbacks(execute=True):
+                    write()
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+
+class ResponseCacheCheckTests(SimpleTestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+    def test_per_process_cache_is_rejected(self):
+        with override_settings(CACHES=self.LOCMEM):
+            self.assertEqual([error.id for error in response_cache_is_shared(None)], ['reviews.E001'])
+        with override_settings(CACHES=self.LOCMEM, RESPONSE_CACHE_ENABLED=False):
+            self.assertEqual(response_cache_is_shared(None), [])
+        self.assertEqual(response_cache_is_shared(None), [])
+
+
+class ConditionalGetTests(CachedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.station = Station.objects.create(name='Andheri')
+        cls.user = User.objects.create(username='rider')
+        Review.objects.create(user=cls.user, station=cls.station, text='Fine', rating=4)
+        rebuild_station_stats([cls.station.id])
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def urls(self):
+        return [
+            '/api/stations/',
+            f'/api/stations/{self.station.id}/',
+            f'/api/reviews/?station={self.station.id}&limit=20',
+            f'/api/stations/{self.station.id}/stats/',
+        ]
+
+    def test_matching_etag_is_not_modified_without_queries(self):
+        for url in self.urls():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('no-cache', response['Cache-Control'])
+            with self.assertNumQueries(0):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, 304, url)
+
+    def test_representations_and_writes_change_the_etag(self):
+        url = f'/api/reviews/?station={self.station.id}&limit=20'
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, HTTP_ACCEPT='application/msgpack')['ETag'], etag)
+        self.assertNotEqual(self.client.get(url + '&fields=id')['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(user=self.user, station=self.station, text='Great', rating=2)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+        etag = self.client.get('/api/stations/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Station.objects.create(name='Bandra')
+        self.assertEqual(self.client.get('/api/stations/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class DetectAspectsTests(SimpleTestCase):
+    def test_whole_words_only(self):
+        self.assertEqual(detect_aspects('Easy access from every place'), ['Metro Station Connectivity'])
+        self.assertNotIn('Metro frequency', detect_aspects('Just like Singapore'))
+        self.assertIn('Metro station infrastructure', detect_aspects('The AC was broken'))
+        self.assertEqual(detect_aspects('Nothing to say'), ['General'])
+
+    def test_plurals_and_case(self):
+        self.assertIn('Metro station infrastructure', detect_aspects('Two ESCALATORS out of order'))
+        self.assertIn('Metro frequency', detect_aspects('Long gaps between trains'))
+        self.assertIn('Metro station infrastructure', detect_aspects('None of the ACs work'))
+
+    def test_many_matches_one_by_one(self):
+        texts = ['Dirty platform', '', None, 'Rude staff at the gate', 'Singapore', 'peak']
+        self.assertEqual(detect_aspects_many(texts), [detect_aspects(text or '') for text in texts])
+        self.assertEqual(detect_aspects_many(texts)[1:3], [['General'], ['General']])
+        # A keyword split across two texts isn't a hit
+        self.assertEqual(detect_aspects_many(['clea', 'n']), [['General'], ['General']])
+
+
+class CheckpointFingerprintTests(SimpleTestCase):
+    def setUp(self):
+        self.model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.model_dir.cleanup)
+        self.write('config.json', b'{}')
+        self.write('model.safetensors', b'\x01' * 1024)
+
+    def write(self, name, content):
+        with open(os.path.join(self.model_dir.name, name), 'wb') as f:
+            f.write(content)
+
+    def fingerprint(self, backend='torch'):
+        return checkpoint_fingerprint(self.model_dir.name, backend).hexdigest()
+
+    def test_retrained_weights_of_the_same_size(self):
+        before = self.fingerprint()
+        self.write('model.safetensors', b'\x01' * 1023 + b'\x02')
+        self.assertNotEqual(self.fingerprint(), before)
+
+    def test_onnx_graph_counts_for_the_onnx_backend_only(self):
+        self.write('model.onnx', b'graph 1')
+        torch_version, onnx_version = self.fingerprint(), self.fingerprint('onnx')
+        self.write('model.onnx', b'graph 2')
+        self.assertEqual(self.fingerprint(), torch_version)
+        self.assertNotEqual(self.fingerprint('onnx'), onnx_version)
+
+
+class MicroBatchSchedulerTests(SimpleTestCase):
+    def setUp(self):
+        self.calls = []
+
+    def echo(self, pairs):
+        """Fake model: a pair's 'scores' are the pair itself, so slices can be checked"""
+        self.calls.append(list(pairs))
+        return [[text, aspect] for text, aspect in pairs]
+
+    def pairs(self, name, n):
+        return [(f'{name}{i}', 'General') for i in range(n)]
+
+    def test_concurrent_callers_share_a_batch_in_order(self):
+        scheduler = MicroBatchScheduler(self.echo, max_batch_size=32, max_wait_ms=200)
+        jobs = {name: self.pairs(name, 3) for name in 'abc'}
+        futures = {name: scheduler.submit(pairs) for name, pairs in jobs.items()}
+        for name, pairs in jobs.items():
+            self.assertEqual(futures[name].result(timeout=5), [list(pair) for pair in pairs])
+        self.assertEqual(self.calls, [jobs['a'] + jobs['b'] + jobs['c']])
+
+    def test_job_larger_than_a_batch_is_sliced(self):
+        scheduler = MicroBatchScheduler(self.echo, max_batch_size=4, max_wait_ms=1)
+        pairs = self.pairs('a', 10)
+        self.assertEqual(scheduler.predict(pairs, timeout=5), [list(pair) for pair in pairs])
+        self.assertEqual([len(call) for call in self.calls], [4, 4, 2])
+        # A job that would overflow the current batch waits for the next one
+        self.calls.clear()
+        first, second = scheduler.submit(self.pairs('b', 3)), scheduler.submit(self.pairs('c', 3))
+        first.result(timeout=5), second.result(timeout=5)
+        self.assertEqual([len(call) for call in self.calls], [3, 3])
+
+    def test_error_reaches_every_waiter(self):
+        def fail(pairs):
+            raise ValueError('model exploded')
+
+        scheduler = MicroBatchScheduler(fail, max_wait_ms=200)
+        futures = [scheduler.submit(self.pairs(name, 2)) for name in 'ab']
+        for future in futures:
+            with self.assertRaisesMessage(ValueError, 'model exploded'):
+                future.result(timeout=5)
+
+    def test_timed_out_job_is_not_computed(self):
+        release = threading.Event()
+
+        def blocking(pairs):
+            release.wait(5)
+            return self.echo(pairs)
+
+        scheduler = MicroBatchScheduler(blocking, max_wait_ms=1)
+        busy = scheduler.submit(self.pairs('a', 1))
+        time.sleep(0.05)  # the worker is now stuck on 'a'
+        with self.assertRaises(FutureTimeoutError):
+            scheduler.predict(self.pairs('late', 1), timeout=0.05)
+        release.set()
+        busy.result(timeout=5)
+        self.assertEqual(scheduler.predict(self.pairs('c', 1), timeout=5), [['c0', 'General']])
+        self.assertNotIn(('late0', 'General'), [pair for call in self.calls for pair in call])
+
+
+class SlowPipeline:
+    """Fake model taking `delay` seconds per batch"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def predict_proba_batch(self, pairs):
+        time.sleep(self.delay)
+        return [[0.1, 0.2, 0.7] for _ in pairs]
+
+
+@override_settings(ABSA_SCHEDULER_ENABLED=True, ABSA_SCHEDULER_TIMEOUT=0.05, ABSA_SERVER_SOCKET='')
+class BulkInferenceTests(SimpleTestCase):
+    @mock.patch('reviews.ml.inference.get_scheduler')
+    @mock.patch('reviews.ml.inference.get_pipeline', lambda: SlowPipeline(0.2))
+    def test_bulk_skips_the_scheduler_and_its_timeout(self, get_scheduler):
+        pairs = [(f'review {i}', 'General') for i in range(100)]
+        self.assertEqual(run_model(pairs, bulk=True), [[0.1, 0.2, 0.7]] * 100)
+        get_scheduler.assert_not_called()
+        run_model(pairs[:1])
+        get_scheduler.return_value.predict.assert_called_once_with(pairs[:1], timeout=0.05)
+
+    def test_client_timeout_grows_with_the_batch(self):
+        self.assertEqual(batch_timeout(30, [('a', 'General')] * 10, 32), 30)
+        self.assertEqual(batch_timeout(30, [('a', 'General')] * 100, 32), 120)
+
+
+def length_scores(pairs):
+    """Fake model: scores that tell the pairs apart"""
+    return [[0.0, 0.0, float(len(text))] for text, _ in pairs]
+
+
+@skipIf(not hasattr(socket, 'AF_UNIX'), 'needs Unix sockets')
+@override_settings(ABSA_SCHEDULER_ENABLED=False)
+class InferenceServerTests(SimpleTestCase):
+    pairs = [('short', 'General'), ('a longer review', 'Metro frequency')]
+
+    def setUp(self):
+        socket_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(socket_dir.cleanup)
+        self.path = os.path.join(socket_dir.name, 'absa.sock')
+        self.client = InferenceClient(self.path, timeout=5)
+
+    def serve(self, predict_fn):
+        server = InferenceServer(self.path, MicroBatchScheduler(predict_fn, max_wait_ms=1), timeout_s=5)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+    def run_model_with_fallback(self):
+        pipeline = mock.Mock(predict_proba_batch=length_scores)
+        with mock.patch('reviews.ml.inference.get_client', return_value=self.client), \
+                mock.patch('reviews.ml.inference.get_pipeline', return_value=pipeline), \
+                self.assertLogs('reviews.ml.inference', 'WARNING'):
+            self.assertEqual(run_model(self.pairs), length_scores(self.pairs))
+
+    def test_round_trip(self):
+        self.serve(length_scores)
+        self.assertEqual(self.client.predict_proba(self.pairs), length_scores(self.pairs))
+        # Again over the kept-alive connection
+        self.assertEqual(self.client.predict_proba(self.pairs[:1]), length_scores(self.pairs[:1]))
+
+    def test_falls_back_without_a_server(self):
+        self.run_model_with_fallback()
+
+    def test_falls_back_on_an_error_frame(self):
+        def fail(pairs):
+            raise RuntimeError('CUDA out of memory')
+
+        self.serve(fail)
+        with self.assertRaisesMessage(InferenceServerError, 'CUDA out of memory'):
+            self.client.predict_proba(self.pairs)
+        self.run_model_with_fallback()
+
+    def test_truncated_frame(self):
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(self.path)
+        listener.listen(1)
+
+        def answer_half():
+            conn, _ = listener.accept()
+            with conn:
+                conn.recv(65536)
+                conn.sendall(struct.pack('>I', 100) + b'{"scores": [[0.1')
+
+        threading.Thread(target=answer_half, daemon=True).start()
+        with self.assertRaisesMessage(InferenceServerError, 'truncated frame'):
+            self.client.predict_proba(self.pairs)
+
+
+class LexiconTests(SimpleTestCase):
+    def test_labels(self):
+        cases = [
+            ('Very clean and spotless', 'Cleanliness', 'Positive'),
+            ('not very clean', 'Cleanliness', 'Negative'),
+            ('Platform is not clean', 'Cleanliness', 'Negative'),
+            ('Trains are always delayed', 'General', 'Negative'),
+            ('It is a station', 'General', 'Neutral'),
+            # Each aspect only sees the clauses that mention it
+            ('The station is clean but staff was rude', 'Cleanliness', 'Positive'),
+            ('The station is clean but staff was rude', 'Staff behavior', 'Negative'),
+        ]
+        for text, aspect, label in cases:
+            with self.subTest(text=text, aspect=aspect):
+                self.assertEqual(lexicon_score(text, aspect)[0], label)
+
+    def test_nothing_to_go_on_is_not_confident(self):
+        self.assertEqual(lexicon_score('It is a station', 'General'), ('Neutral', 0.0))
+
+    def test_cascade_sends_unsure_pairs_to_the_model(self):
+        pairs = [('Very clean and spotless', 'Cleanliness'), ('It is a station', 'General')]
+        model = mock.Mock(return_value=[[0.7, 0.2, 0.1]])
+        scores, tiers = cascade(pairs, 0.8, model)
+        model.assert_called_once_with([('It is a station', 'General')])
+        self.assertEqual(tiers, ['lexicon', 'model'])
+        self.assertEqual(scores[1], [0.7, 0.2, 0.1])
+        self.assertEqual(label_for(scores[0]), 'Positive')
+
+        # Above every lexicon confidence, everything reaches the model
+        model = mock.Mock(return_value=[[0.7, 0.2, 0.1]] * 2)
+        self.assertEqual(cascade(pairs, 1.01, model)[1], ['model', 'model'])
+        model.assert_called_once_with(pairs)
+
+
+@override_settings(ABSA_CASCADE=True, ABSA_CASCADE_THRESHOLD=0.8)
+class CascadeDecidedByTests(CachedTestCase):
+    @mock.patch('reviews.ml.inference.predict_proba', return_value=[[0.7, 0.2, 0.1]])
+    def test_tier_is_stored(self, predict_proba):
+        station = Station.objects.create(name='Andheri')
+        user = User.objects.create(username='rider')
+        lexicon_review = Review.objects.create(user=user, station=station, text='Very clean and spotless', rating=5)
+        model_review = Review.objects.create(user=user, station=station, text='It is a station', rating=3)
+        analyze_reviews_aspects(Review.objects.order_by('id'))
+        predict_proba.assert_called_once_with([('It is a station', 'General')], bulk=True)
+        self.assertEqual(
+            list(AspectRating.objects.order_by('review_id').values_list('review_id', 'aspect', 'sentiment', 'decided_by')),
+            [(lexicon_review.id, 'Cleanliness', 'Positive', 'lexicon'), (model_review.id, 'General', 'Negative', 'model')],
+        )
+
+
+class OverallSentimentTests(CachedTestCase):
+    def test_mean_of_the_aspect_probabilities(self):
+        confident_negative, two_lukewarm_positives = [0.98, 0.01, 0.01], [0.3, 0.3, 0.4]
+        # The mean wins over the majority vote
+        self.assertEqual(overall_label([confident_negative, two_lukewarm_positives, two_lukewarm_positives]), 'Negative')
+        self.assertEqual(overall_label([two_lukewarm_positives]), 'Positive')
+        self.assertEqual(overall_label([]), 'Neutral')
+
+    def test_bulk_analysis_stores_review_sentiment(self):
+        def scores(pairs, bulk=False):
+            return [[0.1, 0.2, 0.7]] * len(pairs), ['model'] * len(pairs)
+
+        user = User.objects.create(username='rider')
+        review = Review.objects.create(
+            user=user, station=Station.objects.create(name='Andheri'), text='Clean platform, polite staff', rating=5
+        )
+        self.assertEqual(review.sentiment, '')
+        with mock.patch('reviews.views.predict_scores_with_tiers', scores):
+            analyze_reviews_aspects([review])
+        review.refresh_from_db()
+        self.assertEqual(review.sentiment, 'Positive')
+
+
+@override_settings(ABSA_MODEL_VERSION='')
+class StaleAfterModelSwapTests(CachedTestCase):
+    def setUp(self):
+        super().setUp()
+        model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(model_dir.cleanup)
+        self.weights = os.path.join(model_dir.name, 'model.safetensors')
+        # model_version() is memoized per process; restore it for the other tests
+        self.addCleanup(setattr, absa_pipeline, '_model_version', absa_pipeline._model_version)
+        patcher = mock.patch.object(absa_pipeline, 'MODEL_DIR', model_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.swap_model(b'\x01' * 1024)
+
+    def swap_model(self, weights):
+        with open(self.weights, 'wb') as f:
+            f.write(weights)
+        absa_pipeline._model_version = None
+
+    def test_swapped_weights_mark_ratings_stale(self):
+        station = Station.objects.create(name='Andheri')
+        user = User.objects.create(username='rider')
+        review = Review.objects.create(user=user, station=station, text='Clean', rating=4, sentiment='Positive')
+        AspectRating.objects.create(
+            review=review, aspect='Cleanliness', sentiment='Positive', model_version=analysis_version()
+        )
+        self.assertFalse(stale_reviews().exists())
+
+        # Retrained checkpoint: same file name and size, different weights
+        self.swap_model(b'\x01' * 1023 + b'\x02')
+        self.assertEqual(list(stale_reviews()), [review])
+
+
+def predict_first_label(pairs, bulk=False):
+    return [[0.7, 0.2, 0.1] for _ in pairs], ['model'] * len(pairs)
+
+
+@mock.patch('reviews.views.predict_scores_with_tiers', predict_first_label)
+class StationStatsConsistencyTests(CachedTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.andheri = Station.objects.create(name='Andheri')
+        self.bandra = Station.objects.create(name='Bandra')
+        self.staff = User.objects.create(username='staff', is_staff=True)
+        self.rider = User.objects.create(username='rider')
+        # Stats rows are otherwise created lazily, so a rebuild would add them
+        rebuild_station_stats()
+
+    def snapshot(self):
+        return (
+            list(StationStats.objects.order_by('station_id').values(
+                'station_id', 'review_count', 'rating_sum', 'rating_counts', 'sentiment_counts', 'aspect_counts'
+            )),
+            list(StationDailyRating.objects.order_by('station_id', 'day', 'rating').values(
+                'station_id', 'day', 'rating', 'count'
+            )),
+            list(StationDailyAspect.objects.order_by('station_id', 'day', 'aspect', 'sentiment').values(
+                'station_id', 'day', 'aspect', 'sentiment', 'count'
+            )),
+        )
+
+    def assertStatsMatchRebuild(self):
+        incremental = self.snapshot()
+        rebuild_station_stats()
+        self.assertEqual(incremental, self.snapshot())
+
+    def post_review(self, station, text, rating):
+        response = self.client.post('/api/reviews/', {'station': station.id, 'text': text, 'rating': rating})
+        self.assertEqual(response.status_code, 201)
+        return Review.objects.get(pk=response.data['id'])
+
+    def test_incremental_writes_match_a_rebuild(self):
+        first = self.post_review(self.andheri, 'Dirty platform and rude staff', 2)
+        second = self.post_review(self.andheri, 'Crowded at peak hours', 3)
+        third = self.post_review(self.bandra, 'Clean station', 5)
+        self.assertStatsMatchRebuild()
+
+        # Reanalysis diff: a changed label, a new aspect, a dropped aspect
+        store_reviews_aspects([
+            (first, [('Cleanliness', 'Negative', 'model'), ('Ticketing system', 'Positive', 'model')], 'Negative'),
+            (second, [], 'Neutral'),
+        ], 'v2')
+        self.assertStatsMatchRebuild()
+
+        # Rating change and a move to another station
+        self.client.force_authenticate(self.staff)
+        self.client.patch(f'/api/reviews/{first.id}/', {'rating': 4, 'station': self.bandra.id})
+        self.assertStatsMatchRebuild()
+
+        self.client.delete(f'/api/reviews/{third.id}/')
+        self.assertStatsMatchRebuild()
+
+    def test_admin_and_cascade_writes_match_a_rebuild(self):
+        review = Review.objects.create(user=self.rider, station=self.andheri, text='Fine', rating=4)
+        aspect = AspectRating.objects.create(review=review, aspect='Cleanliness', sentiment='Positive')
+        other = AspectRating.objects.create(review=review, aspect='Staff behavior', sentiment='Negative')
+        self.assertStatsMatchRebuild()
+
+        aspect.sentiment = 'Negative'
+        aspect.save()
+        other.delete()
+        review.rating, review.station = 1, self.bandra
+        review.save()
+        self.assertStatsMatchRebuild()
+
+        Review.objects.create(user=self.rider, station=self.andheri, text='Good', rating=5)
+        Review.objects.get(pk=review.pk).delete()
+        self.assertStatsMatchRebuild()
+
+        # Deleting the user cascades to their reviews and aspect ratings
+        self.rider.delete()
+        self.assertStatsMatchRebuild()
+        self.assertEqual(StationStats.objects.get(station=self.andheri).review_count, 0)
+
+        # Deleting a station takes its stats row along without recreating it
+        self.andheri.delete()
+        self.assertFalse(StationStats.objects.filter(station_id=self.andheri.id).exists())
+
+    def test_aspect_rating_deletes_match_a_rebuild(self):
+        review = Review.objects.create(user=self.rider, station=self.andheri, text='Fine', rating=4)
+        for aspect, sentiment in [('Cleanliness', 'Positive'), ('Staff behavior', 'Negative'), ('General', 'Negative')]:
+            AspectRating.objects.create(review=review, aspect=aspect, sentiment=sentiment)
+        AspectRating.objects.filter(review=review, sentiment='Negative').delete()
+        self.assertStatsMatchRebuild()
+        review.aspects.get().delete()
+        self.assertStatsMatchRebuild()
+
+        # Nothing listens to their delete signals, so a review's ratings go in one DELETE
+        self.assertTrue(Collector(using='default').can_fast_delete(review.aspects.all()))
+
+    def test_orm_delete_invalidates_stats_and_etag(self):
+        review = Review.objects.create(user=self.rider, station=self.andheri, text='Fine', rating=4)
+        url = f'/api/stations/{self.andheri.id}/stats/'
+        response = self.client.get(url)
+        self.assertEqual(response.data['totalReviews'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.get(pk=review.pk).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['totalReviews'], 0)
+
+
+class BulkStationStatsTests(CachedTestCase):
+    url = '/api/stations/stats/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.andheri = Station.objects.create(name='Andheri', line='Blue Line')
+        cls.bandra = Station.objects.create(name='Bandra', line='Blue Line')
+        cls.churchgate = Station.objects.create(name='Churchgate', line='Western Line')
+        cls.user = User.objects.create(username='rider')
+        for station, sentiment in [(cls.andheri, 'Positive'), (cls.bandra, 'Negative'), (cls.churchgate, 'Positive')]:
+            for _ in range(RANKING_MIN_MENTIONS):
+                review = Review.objects.create(user=cls.user, station=station, text='Clean', rating=4)
+                AspectRating.objects.create(review=review, aspect='Cleanliness', sentiment=sentiment)
+
+    def test_filters(self):
+        data = self.client.get(self.url).data
+        self.assertEqual(list(data['stations']), [self.andheri.id, self.bandra.id, self.churchgate.id])
+        self.assertEqual(data['lines']['Blue Line']['stations'], [self.andheri.id, self.bandra.id])
+        self.assertEqual(data['lines']['Blue Line']['totalReviews'], 2 * RANKING_MIN_MENTIONS)
+
+        data = self.client.get(self.url, {'ids': f'{self.bandra.id}, {self.churchgate.id},'}).data
+        self.assertEqual(list(data['stations']), [self.bandra.id, self.churchgate.id])
+        self.assertEqual(sorted(data['lines']), ['Blue Line', 'Western Line'])
+
+        data = self.client.get(self.url, {'line': 'Blue Line'}).data
+        self.assertEqual(list(data['stations']), [self.andheri.id, self.bandra.id])
+
+    def test_top(self):
+        ranked = self.client.get(self.url).data['topAspects']['Cleanliness']
+        self.assertEqual([r['station'] for r in ranked], [self.andheri.id, self.churchgate.id, self.bandra.id])
+        ranked = self.client.get(self.url, {'top': 1}).data['topAspects']['Cleanliness']
+        self.assertEqual(ranked, [{'station': self.andheri.id, 'positiveShare': 1.0, 'mentions': RANKING_MIN_MENTIONS}])
+
+    def test_bad_parameters(self):
+        too_many = ','.join(str(i) for i in range(BULK_STATS_MAX_IDS + 1))
+        for params in [{'ids': '1,two'}, {'ids': too_many}, {'top': 'five'}, {'top': -1}]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'ids': too_many[:-4]}).status_code, 200)
+
+    def test_conditional_get(self):
+        url = f'{self.url}?ids={self.andheri.id}'
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(f'{url}&top=1')['ETag'], etag)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Any review write can move the rankings, so it changes every bulk ETag
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(user=self.user, station=self.bandra, text='Fine', rating=3)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class StationTimeseriesTests(CachedTestCase):
+    def test_range_is_bounded(self):
+        station = Station.objects.create(name='Andheri')
+        url = f'/api/stations/{station.id}/timeseries/'
+        response = self.client.get(url, {'from': '2024-01-01', 'to': '2025-12-31', 'granularity': 'month'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['series']), 24)
+        response = self.client.get(url, {'from': '0001-01-01', 'to': '9999-12-31'})
+        self.assertEqual(response.status_code, 400)
+
+
+class KeysetPaginationTests(CachedTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.station = Station.objects.create(name='Andheri')
+        user = User.objects.create(username='rider')
+        reviews = Review.objects.bulk_create(
+            [Review(user=user, station=cls.station, text=f'Review {i}', rating=3) for i in range(8)]
+        )
+        # Three pairs of reviews share a timestamp, so only the id breaks the tie
+        now = timezone.now()
+        for i, review in enumerate(reviews):
+            Review.objects.filter(pk=review.pk).update(created_at=now - timedelta(minutes=i // 2))
+        cls.expected = list(Review.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        rebuild_station_stats([cls.station.id])
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def get(self, link):
+        return self.client.get(link.replace('?', '/api/reviews/?', 1)).data
+
+    def ids(self, page):
+        return [review['id'] for review in page['results']]
+
+    def test_next_then_previous_with_ties(self):
+        page = self.get(f'?station={self.station.id}&limit=3')
+        self.assertEqual(page['count'], 8)
+        self.assertIsNone(page['previous'])
+        pages = [self.ids(page)]
+        while page['next']:
+            page = self.get(page['next'])
+            pages.append(self.ids(page))
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertEqual([len(ids) for ids in pages], [3, 3, 2])
+
+        # Back from the last page, the same pages in reverse
+        for ids in reversed(pages[:-1]):
+            page = self.get(page['previous'])
+            self.assertEqual(self.ids(page), ids)
+        self.assertIsNone(page['previous'])
+
+    def test_invalid_cursor(self):
+        for cursor in ('garbage', 'WyJzaWRld2F5cyIsICIyMDI0LTAxLTAxIiwgMV0'):
+            response = self.client.get(f'/api/reviews/?station={self.station.id}&limit=3&cursor={cursor}')
+            self.assertEqual(response.status_code, 400)
+
+    def test_count_can_be_left_out(self):
+        with self.assertNumQueries(2):
+            page = self.get(f'?station={self.station.id}&limit=3&count=0&fields=id')
+        self.assertNotIn('count', page)
+        self.assertEqual(self.ids(page), self.expected[:3])
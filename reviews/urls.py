@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import StationViewSet, ReviewViewSet, station_stats, whoami
+from .views import StationViewSet, ReviewViewSet, station_stats, station_timeseries_view, station_export, ml_cache_stats, whoami
 from .auth_views import register_user
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -15,4 +15,7 @@ urlpatterns = [
     path('auth/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/whoami/', whoami),
     path('stations/<int:station_id>/stats/', station_stats, name='station-stats'),
+    path('stations/<int:station_id>/timeseries/', station_timeseries_view, name='station-timeseries'),
+    path('stations/<int:station_id>/export/', station_export, name='station-export'),
+    path('ml/cache-stats/', ml_cache_stats, name='ml-cache-stats'),
 ]
@@ -1,15 +1,35 @@
 from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from rest_framework.decorators import action, api_view, permission_classes, authentication_classes
 from rest_framework.response import Response
-from rest_framework_simplejwt.authentication import JWTAuthentication
-from django.db.models import Avg, Count
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Prefetch, Q, Subquery
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 from django.contrib.auth.models import User
 from .models import Station, Review, AspectRating
-from .serializers import StationSerializer, ReviewSerializer, StatsSerializer
-from .ml.absa_pipeline import ABSAPipeline
-from .ml.absa_pipeline import get_aspect_sentiments
+from .serializers import StationSerializer, ReviewSerializer, ReviewReadSerializer
+from .serializers import requested_fields
+from .ml.absa_pipeline import analysis_version, detect_aspects, detect_aspects_many
+from .ml.absa_pipeline import label_for, overall_label
+from .ml.cache import get_cache
+from .stats import StatsDelta, apply_stats_deltas, get_station_stats, stats_tracked
+from .stats import GRANULARITIES, TIMESERIES_MAX_DAYS, aspect_trends, month_counts, month_starts, review_added, review_day
+from .stats import review_delta, review_removal_delta, station_timeseries, trend_from_row, trend_windows
+from .stats import aspect_rankings, aspect_trends_many, combine_stats, get_stations_stats, month_counts_many
+from .stats import BULK_STATS_MAX_IDS, day_start
+from .ml.inference import predict_scores_with_tiers
+from .renderers import FastJSONRenderer
+from .response_cache import ALL_STATIONS, CATALOG, cached_response, station_version
+from .conditional import conditional, conditional_method, representation_etag, reviews_last_modified, start_of_today
 from rest_framework.permissions import AllowAny
-import threading
+import base64
+import binascii
+import csv
+import json
+from datetime import datetime
 from rest_framework.decorators import api_view
 
 
@@ -30,6 +50,80 @@ class StationViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = [AllowAny]
     #permission_classes = [permissions.IsAuthenticated]
 
+    @conditional_method(lambda request, *args, **kwargs: representation_etag(request, station_version(CATALOG)))
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_method(lambda request, *args, **kwargs: representation_etag(request, station_version(CATALOG)))
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @conditional_method(lambda request, *args, **kwargs: representation_etag(
+        request, station_version(CATALOG), station_version(ALL_STATIONS), timezone.localdate().isoformat()
+    ))
+    @action(detail=False, methods=['get'], url_path='stats')
+    def bulk_stats(self, request):
+        """Stats for many stations at once: /stations/stats/?ids=1,2,3 or ?line=Blue Line (all stations by default).
+
+        Returns per-station stats keyed by station ID, rollups per line over the
+        selected stations, and the top ?top= (default 5) stations per aspect.
+        """
+        stations = Station.objects.order_by('id')
+        if 'ids' in request.query_params:
+            try:
+                ids = [int(i) for i in request.query_params['ids'].split(',') if i.strip()]
+            except ValueError:
+                return Response({'detail': 'ids must be a comma-separated list of station IDs.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if len(ids) > BULK_STATS_MAX_IDS:
+                return Response({'detail': f'ids may list at most {BULK_STATS_MAX_IDS} stations.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            stations = stations.filter(id__in=ids)
+        if 'line' in request.query_params:
+            stations = stations.filter(line=request.query_params['line'])
+        try:
+            top = int(request.query_params.get('top', 5))
+            if top < 0:
+                raise ValueError(top)
+        except ValueError:
+            return Response({'detail': 'top must be a non-negative integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        station_lines = dict(stations.values_list('id', 'line'))
+        station_ids = list(station_lines)
+        stats = get_stations_stats(station_ids)
+        months = month_counts_many(station_ids)
+        trends = aspect_trends_many(station_ids)
+        line_trends = aspect_trends_many(station_ids, group_by='station__line')
+
+        lines = defaultdict(list)
+        for station_id in station_ids:
+            lines[station_lines[station_id]].append(station_id)
+
+        return Response({
+            'stations': {
+                station_id: station_stats_payload(stats[station_id], months[station_id], trends[station_id])
+                for station_id in station_ids
+            },
+            'lines': {
+                line: dict(
+                    station_stats_payload(
+                        combine_stats(stats[i] for i in ids),
+                        [sum(months[i][0] for i in ids), sum(months[i][1] for i in ids)],
+                        line_trends[line]
+                    ),
+                    stations=ids
+                )
+                for line, ids in sorted(lines.items())
+            },
+            'topAspects': {
+                aspect: [
+                    {'station': station_id, 'positiveShare': round(share, 4), 'mentions': mentions}
+                    for station_id, share, mentions in ranked
+                ]
+                for aspect, ranked in aspect_rankings(stats, top).items()
+            },
+        })
+
 # ---------- Review viewset ----------
 class ReviewViewSet(viewsets.ModelViewSet):
     queryset = Review.objects.all().order_by('-created_at')
@@ -40,13 +134,30 @@ class ReviewViewSet(viewsets.ModelViewSet):
     permission_classes = [AllowAny]
 
     def get_queryset(self):
-        queryset = Review.objects.select_related('user', 'station').order_by('-created_at')
+        queryset = Review.objects.select_related('user').prefetch_related(
+            Prefetch('aspects', queryset=AspectRating.objects.order_by('id'))
+        ).order_by('-created_at', '-id')
         station_id = self.request.query_params.get('station', None)
         if station_id:
             queryset = queryset.filter(station_id=station_id)
         return queryset
     
+    @conditional_method(
+        lambda request, *args, **kwargs: representation_etag(
+            request, station_version(station_param(request) or ALL_STATIONS)
+        ),
+        lambda request, *args, **kwargs: reviews_last_modified(station_param(request)),
+    )
     def list(self, request, *args, **kwargs):
+        # One station's pages are cached until a write to that station (see response_cache.py)
+        station_id = station_param(request)
+        if station_id is None:
+            return self.uncached_list(request)
+        return cached_response(
+            'reviews', station_id, request.query_params.lists(), lambda: self.uncached_list(request)
+        )
+
+    def uncached_list(self, request):
         # Get limit and offset from query params
         limit = request.query_params.get('limit', None)
         offset = request.query_params.get('offset', 0)
@@ -58,24 +169,72 @@ class ReviewViewSet(viewsets.ModelViewSet):
             try:
                 limit = int(limit)
                 offset = int(offset)
-                total_count = queryset.count()
-                queryset = queryset[offset:offset + limit]
-                
-                # Serialize the queryset
-                serializer = self.get_serializer(queryset, many=True)
-                
-                # Return with pagination info
-                return Response({
-                    'results': serializer.data,
-                    'count': total_count,
-                    'next': f'?limit={limit}&offset={offset + limit}' if offset + limit < total_count else None,
-                    'previous': f'?limit={limit}&offset={max(0, offset - limit)}' if offset > 0 else None,
-                })
             except (ValueError, TypeError):
-                pass
+                limit = None
+        if limit and (offset == 0 or 'cursor' in request.query_params):
+            return self.keyset_page(request, queryset, limit)
+        if limit:
+            total_count = queryset.count()
+            queryset = queryset[offset:offset + limit]
+            
+            # Serialize the queryset
+            serializer = ReviewReadSerializer(queryset, requested_fields(request))
+            
+            # Return with pagination info
+            return Response({
+                'results': serializer.data,
+                'count': total_count,
+                'next': f'?limit={limit}&offset={offset + limit}' if offset + limit < total_count else None,
+                'previous': f'?limit={limit}&offset={max(0, offset - limit)}' if offset > 0 else None,
+            })
         
         # Default behavior (no pagination)
-        return super().list(request, *args, **kwargs)
+        return Response(ReviewReadSerializer(queryset, requested_fields(request)).data)
+
+    def keyset_page(self, request, queryset, limit):
+        """One page of reviews after/before an opaque (created_at, id) cursor, newest first.
+
+        Every page is an index range scan of `limit + 1` rows, however deep it
+        is. The total count comes from the materialized station stats; pass
+        count=0 to leave it out.
+        """
+        cursor = request.query_params.get('cursor')
+        fields = requested_fields(request)
+        try:
+            direction, created_at, review_id = decode_cursor(cursor) if cursor else ('next', None, None)
+        except ValueError:
+            return Response({'detail': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if direction == 'next':
+            if cursor:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=review_id))
+            page = list(ReviewReadSerializer.values(queryset.order_by('-created_at', '-id')[:limit + 1], fields))
+            has_more = len(page) > limit
+            page = page[:limit]
+            has_next, has_previous = has_more, bool(cursor)
+        else:
+            queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=review_id))
+            page = list(ReviewReadSerializer.values(queryset.order_by('created_at', 'id')[:limit + 1], fields))
+            has_more = len(page) > limit
+            page = page[:limit][::-1]
+            has_next, has_previous = True, has_more
+
+        params = request.query_params.copy()
+        params['limit'] = limit
+        params.pop('offset', None)
+
+        def link(direction, row):
+            params['cursor'] = encode_cursor(direction, row['created_at'], row['id'])
+            return f'?{params.urlencode()}'
+
+        data = {
+            'results': ReviewReadSerializer(page, fields).data,
+            'next': link('next', page[-1]) if page and has_next else None,
+            'previous': link('prev', page[0]) if page and has_previous else None,
+        }
+        if request.query_params.get('count') != '0':
+            data['count'] = review_count(request.query_params.get('station'))
+        return Response(data)
 
     def perform_create(self, serializer):
         # Handle case where user is not authenticated
@@ -91,7 +250,9 @@ class ReviewViewSet(viewsets.ModelViewSet):
                     'last_name': 'User'
                 }
             )
-        review = serializer.save(user=user)
+        with transaction.atomic(), stats_tracked():
+            review = serializer.save(user=user)
+            review_added(review)
 
         # Analyze aspects and store in database synchronously so the client
         # sees aspect badges and updated stats immediately after creation.
@@ -101,6 +262,14 @@ class ReviewViewSet(viewsets.ModelViewSet):
             # Log error but don't break the review creation
             print(f"Error analyzing aspects for review {review.id}: {e}")
 
+    def perform_update(self, serializer):
+        # The review may change rating or station: count it out as it was and back in as saved
+        with transaction.atomic(), stats_tracked():
+            old = Review.objects.select_for_update().get(pk=serializer.instance.pk)
+            apply_stats_deltas({old.station_id: review_removal_delta(old)})
+            review = serializer.save()
+            apply_stats_deltas({review.station_id: review_delta(review)})
+
     def destroy(self, request, *args, **kwargs):
         """Allow deletion only by the review author or staff users."""
         instance = self.get_object()
@@ -113,93 +282,468 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return super().destroy(request, *args, **kwargs)
         return Response({'detail': 'You do not have permission to delete this review.'}, status=status.HTTP_403_FORBIDDEN)
 
+    def perform_destroy(self, instance):
+        with transaction.atomic(), stats_tracked():
+            delta = review_removal_delta(instance)
+            station_id = instance.station_id
+            instance.delete()
+            apply_stats_deltas({station_id: delta})
+
+def station_param(request):
+    """The ?station= filter of the reviews list as an int, or None"""
+    try:
+        return int(request.query_params['station'])
+    except (KeyError, ValueError):
+        return None
+
+
+def encode_cursor(direction, created_at, review_id):
+    """Opaque keyset cursor for the reviews list."""
+    raw = json.dumps([direction, created_at.isoformat(), review_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(direction, created_at, review_id) from encode_cursor(); ValueError if it isn't one."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, created_at, review_id = json.loads(raw)
+        created_at = datetime.fromisoformat(created_at)
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+    if direction not in ('next', 'prev') or not isinstance(review_id, int):
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+    return direction, created_at, review_id
+
+
+def review_count(station_id=None):
+    """Number of reviews (of one station) from the materialized StationStats counters."""
+    if station_id:
+        try:
+            return get_station_stats(int(station_id)).review_count
+        except ValueError:
+            return 0
+    stats = get_stations_stats(list(Station.objects.values_list('id', flat=True)))
+    return sum(row.review_count for row in stats.values())
+
+
 # ---------- Stats endpoint ----------
 @api_view(['GET'])
 @authentication_classes([])
 @permission_classes([AllowAny])
+@conditional(
+    lambda request, station_id: representation_etag(
+        request, station_version(station_id), timezone.localdate().isoformat()
+    ),
+    # Month counts roll over at midnight even without new reviews
+    lambda request, station_id: max(reviews_last_modified(station_id), start_of_today()),
+)
 def station_stats(request, station_id):
-    reviews = Review.objects.filter(station_id=station_id)
-    total_reviews = reviews.count()
-    
-    # Calculate average rating, default to 0 if no reviews
-    if total_reviews > 0:
-        overall_rating = reviews.aggregate(avg=Avg('rating'))['avg']
-        # Ensure it's a float, not None
-        overall_rating = float(overall_rating) if overall_rating is not None else 0.0
-    else:
-        overall_rating = 0.0
-
-    # Build review distribution with integer keys
-    review_dist_dict = {}
-    if total_reviews > 0:
-        for r in reviews.values('rating').annotate(count=Count('rating')):
-            review_dist_dict[int(r['rating'])] = int(r['count'])
-
-    # Get aspect sentiments from database (much faster than ML processing)
-    aspects = get_aspects_from_db(reviews)
-
-    # Calculate recent trends (using current month from datetime)
-    from datetime import datetime
-    current_month = datetime.now().month
-    recent_trends = {
-        "thisMonth": reviews.filter(created_at__month=current_month).count(),
-        "lastMonth": reviews.filter(created_at__month=current_month - 1 if current_month > 1 else 12).count(),
-        "sentiment": "Positive"  # optional: compute overall sentiment
-    }
+    # Month counts and trends depend on the date, so it is part of the cache key
+    return cached_response(
+        'stats', station_id, [('today', timezone.localdate().isoformat())],
+        lambda: Response(
+            materialized_station_stats(station_id) if getattr(settings, 'STATION_STATS_MATERIALIZED', True)
+            else aggregate_station_stats(station_id)
+        )
+    )
 
-    data = {
-        "overallRating": overall_rating,
+
+def stats_payload(total_reviews, rating_sum, rating_counts, aspect_counts, this_month, last_month,
+                  sentiment_counts, aspect_trend):
+    """Build the station stats response from aggregate counts."""
+    return {
+        "overallRating": rating_sum / total_reviews if total_reviews > 0 else 0.0,
         "totalReviews": total_reviews,
-        "reviewDistribution": review_dist_dict,
-        "aspects": aspects,
-        "recentTrends": recent_trends
+        # Review distribution with integer keys
+        "reviewDistribution": {int(rating): count for rating, count in rating_counts.items()},
+        "aspects": format_aspects(aspect_counts, aspect_trend),
+        "recentTrends": {
+            "thisMonth": this_month,
+            "lastMonth": last_month,
+            # Most common stored overall review sentiment
+            "sentiment": max(sorted(sentiment_counts), key=sentiment_counts.get) if sentiment_counts else "Neutral"
+        }
     }
-    return Response(data)
+
+
+def materialized_station_stats(station_id):
+    """Station stats from the StationStats row and the daily rollups (see reviews/stats.py)."""
+    return station_stats_payload(get_station_stats(station_id), month_counts(station_id), aspect_trends(station_id))
+
+
+def station_stats_payload(stats, months, trends):
+    """stats_payload for a StationStats row, (this month, last month) counts and aspect trends."""
+    return stats_payload(
+        stats.review_count, stats.rating_sum, stats.rating_counts, stats.aspect_counts,
+        months[0], months[1], stats.sentiment_counts, trends
+    )
+
+
+def aggregate_station_stats(station_id):
+    """Station stats straight from the review tables in two GROUP BY queries."""
+    this_month_start, last_month_start = (day_start(day) for day in month_starts())
+    this_month = Q(created_at__gte=this_month_start)
+    last_month = Q(created_at__gte=last_month_start, created_at__lt=this_month_start)
+    # One row per rating value; everything else is a conditional count on it
+    rows = Review.objects.filter(station_id=station_id).values('rating').annotate(
+        n=Count('id'),
+        this_month=Count('id', filter=this_month),
+        last_month=Count('id', filter=last_month),
+        positive=Count('id', filter=Q(sentiment__iexact='positive')),
+        negative=Count('id', filter=Q(sentiment__iexact='negative')),
+        analyzed=Count('id', filter=~Q(sentiment='')),
+    ).order_by()
+
+    rating_counts = {}
+    sentiment_counts = Counter()
+    this_month_count = last_month_count = 0
+    for row in rows:
+        rating_counts[row['rating']] = row['n']
+        this_month_count += row['this_month']
+        last_month_count += row['last_month']
+        sentiment_counts['Positive'] += row['positive']
+        sentiment_counts['Negative'] += row['negative']
+        sentiment_counts['Neutral'] += row['analyzed'] - row['positive'] - row['negative']
+
+    aspect_counts, aspect_trend = aspect_stats_from_db(station_id)
+    return stats_payload(
+        sum(rating_counts.values()),
+        sum(rating * n for rating, n in rating_counts.items()),
+        rating_counts,
+        aspect_counts,
+        this_month_count,
+        last_month_count,
+        {sentiment: n for sentiment, n in sentiment_counts.items() if n},
+        aspect_trend,
+    )
+
+
+def aspect_stats_from_db(station_id):
+    """({aspect: sentiment counts}, {aspect: trend}) straight from AspectRating in one GROUP BY query
+    (see aspect_sentiment_counts and stats.trend_direction)."""
+    prior_start, recent_start = (day_start(day) for day in trend_windows())
+    recent = Q(review__created_at__gte=recent_start)
+    prior = Q(review__created_at__gte=prior_start, review__created_at__lt=recent_start)
+    positive, negative = Q(sentiment__iexact='positive'), Q(sentiment__iexact='negative')
+    rows = AspectRating.objects.filter(review__station_id=station_id).values('aspect').annotate(
+        n=Count('id'),
+        positive=Count('id', filter=positive),
+        negative=Count('id', filter=negative),
+        recent_total=Count('id', filter=recent),
+        recent_positive=Count('id', filter=recent & positive),
+        recent_negative=Count('id', filter=recent & negative),
+        prior_total=Count('id', filter=prior),
+        prior_positive=Count('id', filter=prior & positive),
+        prior_negative=Count('id', filter=prior & negative),
+    ).order_by()
+    counts, trends = {}, {}
+    for row in rows:
+        counts[row['aspect']] = {
+            "Positive": row['positive'],
+            "Negative": row['negative'],
+            "Neutral": row['n'] - row['positive'] - row['negative'],
+        }
+        trends[row['aspect']] = trend_from_row(row)
+    return counts, trends
+
+
+# ---------- Time-series endpoint ----------
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def station_timeseries_view(request, station_id):
+    """Reviews, ratings and aspect sentiments per day/week/month.
+
+    Query params: from, to (YYYY-MM-DD, inclusive; default the last 90 days,
+    at most TIMESERIES_MAX_DAYS) and granularity (day, week or month; default day).
+    """
+    from datetime import date, timedelta
+    try:
+        end = date.fromisoformat(request.query_params['to']) if 'to' in request.query_params else timezone.localdate()
+        start = (
+            date.fromisoformat(request.query_params['from']) if 'from' in request.query_params
+            else end - timedelta(days=89)
+        )
+    except ValueError:
+        return Response({'detail': 'from and to must be dates (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+    granularity = request.query_params.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        return Response(
+            {'detail': f'granularity must be one of {", ".join(GRANULARITIES)}.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if start > end:
+        return Response({'detail': 'from must not be after to.'}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days >= TIMESERIES_MAX_DAYS:
+        return Response(
+            {'detail': f'from..to may span at most {TIMESERIES_MAX_DAYS} days.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    return Response({
+        'station': station_id,
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'granularity': granularity,
+        'series': station_timeseries(station_id, start, end, granularity),
+    })
+
+
+# ---------- Streaming export endpoint ----------
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_CSV_COLUMNS = ['id', 'user', 'station', 'text', 'rating', 'sentiment', 'created_at', 'aspects']
+
+
+class Echo:
+    """File-like object whose write() returns the line, for csv.writer in a generator."""
+
+    def write(self, value):
+        return value
+
+
+def export_chunks(station_id, chunk_size=EXPORT_CHUNK_SIZE):
+    """Serialized reviews of a station, oldest first, one list per chunk of rows.
+
+    Rows come from a server-side cursor (iterator) and each chunk's aspects are
+    fetched in one query, so memory is bounded by the chunk size.
+    """
+    rows = ReviewReadSerializer.values(
+        Review.objects.filter(station_id=station_id).order_by('created_at', 'id')
+    ).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield ReviewReadSerializer(chunk).data
+            chunk = []
+    if chunk:
+        yield ReviewReadSerializer(chunk).data
+
+
+def export_ndjson(station_id):
+    renderer = FastJSONRenderer()
+    for chunk in export_chunks(station_id):
+        yield b''.join(renderer.render(review) + b'\n' for review in chunk)
+
+
+def export_csv(station_id):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_CSV_COLUMNS)
+    for chunk in export_chunks(station_id):
+        yield ''.join(
+            writer.writerow([
+                *(review[column] for column in EXPORT_CSV_COLUMNS[:-1]),
+                '; '.join(f'{a["aspect"]}={a["sentiment"]}' for a in review['aspects']),
+            ])
+            for review in chunk
+        )
+
+
+EXPORT_FORMATS = {
+    'ndjson': (export_ndjson, 'application/x-ndjson'),
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+}
+
+
+@require_GET
+def station_export(request, station_id):
+    """All reviews of a station with their aspect ratings, streamed as ?format=ndjson (default) or csv.
+
+    A plain Django view: DRF would treat ?format= as a renderer override.
+    CSV rows carry the aspects as "Aspect=Sentiment; ..." in the last column.
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse(
+            {'detail': f'format must be one of {", ".join(EXPORT_FORMATS)}.'}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if not Station.objects.filter(id=station_id).exists():
+        return JsonResponse({'detail': 'Station not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    generate, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(generate(station_id), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="station-{station_id}-reviews.{export_format}"'
+    return response
+
+
+# ---------- ML cache stats endpoint ----------
+@api_view(['GET'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def ml_cache_stats(request):
+    """Hit/miss counters of the ABSA result cache in this process."""
+    return Response(get_cache().stats())
 
 
 # Helper function to analyze a review and store aspects in database
 def analyze_review_aspects(review):
     """Analyze a review's aspects using ML and store results in database."""
-    from .ml.absa_pipeline import absa
-    
-    # Delete existing aspect ratings for this review
-    AspectRating.objects.filter(review=review).delete()
-    
     # Step 1: Detect which aspects are mentioned in the review
-    detected_aspects = absa.detect_aspects(review.text)
+    detected_aspects = detect_aspects(review.text)
     
-    # Step 2: For each detected aspect, predict sentiment
-    for aspect in detected_aspects:
-        try:
-            label = absa.predict_aspect_sentiment(review.text, aspect)
-            # Normalize label
-            if not label or label == "0":
-                label = "Neutral"
+    # Step 2: Predict sentiment for all detected aspects in one batched pass;
+    # the overall sentiment is derived from the same probabilities
+    version = analysis_version()
+    try:
+        scores, tiers = predict_scores_with_tiers([(review.text, aspect) for aspect in detected_aspects])
+        predictions = [(label_for(row), tier) for row, tier in zip(scores, tiers)]
+        sentiment = overall_label(scores)
+    except Exception:
+        # If analysis fails, default to Neutral (unversioned, so a stale-only
+        # reanalysis picks it up again) and leave the overall sentiment unknown
+        predictions = [("Neutral", "")] * len(detected_aspects)
+        version = AspectRating.UNVERSIONED
+        sentiment = ''
+
+    store_review_aspects(
+        review,
+        [(aspect, label, tier) for aspect, (label, tier) in zip(detected_aspects, predictions)],
+        version,
+        sentiment
+    )
+
+
+def analyze_reviews_aspects(reviews):
+    """Batch version of analyze_review_aspects for bulk callers.
+
+    All (review, aspect) pairs go through inference together. Unlike the
+    single-review helper, inference errors are raised instead of being stored
+    as Neutral. Returns {review_id: [(aspect, sentiment, tier), ...]}.
+    """
+    reviews = list(reviews)
+    detected = detect_aspects_many([review.text for review in reviews])
+    pairs = [(review.text, aspect) for review, aspects in zip(reviews, detected) for aspect in aspects]
+    version = analysis_version()
+    scores, tiers = predict_scores_with_tiers(pairs, bulk=True)
+    predictions = iter(zip(scores, tiers))
+
+    results = {}
+    batch = []
+    for review, aspects in zip(reviews, detected):
+        review_predictions = [next(predictions) for _ in aspects]
+        results[review.id] = [
+            (aspect, label_for(row), tier) for aspect, (row, tier) in zip(aspects, review_predictions)
+        ]
+        batch.append((review, results[review.id], overall_label([row for row, _ in review_predictions])))
+    store_reviews_aspects(batch, version)
+    return results
+
+
+def store_review_aspects(review, aspect_results, version, sentiment):
+    """Store a review's aspect ratings [(aspect, sentiment, tier), ...] produced by `version`,
+    and its overall sentiment."""
+    store_reviews_aspects([(review, aspect_results, sentiment)], version)
+
+
+def store_reviews_aspects(batch, version):
+    """Batch version of store_review_aspects for [(review, aspect_results, sentiment), ...].
+
+    Everything is written in one transaction, and only what changed: new
+    aspects are bulk-inserted, changed ones bulk-updated and aspects that are
+    no longer detected deleted. The stations' StationStats follow in the same
+    transaction.
+    """
+    reviews = {review.id: review for review, _, _ in batch}
+    with transaction.atomic(), stats_tracked():
+        existing = {}
+        duplicates = []
+        for rating in AspectRating.objects.filter(review_id__in=reviews):
+            if (rating.review_id, rating.aspect) in existing:
+                duplicates.append(rating)
             else:
-                label = str(label).strip().capitalize()
-                if label not in ["Positive", "Negative", "Neutral"]:
-                    label = "Neutral"
-            
-            # Store in database
-            AspectRating.objects.create(
-                review=review,
-                aspect=aspect,
-                sentiment=label
-            )
-        except Exception as e:
-            # If analysis fails, default to Neutral
-            AspectRating.objects.create(
-                review=review,
-                aspect=aspect,
-                sentiment="Neutral"
-            )
+                existing[(rating.review_id, rating.aspect)] = rating
+
+        to_create, to_update, changed_reviews = [], [], []
+        deltas = defaultdict(StatsDelta)
+        for review, aspect_results, sentiment in batch:
+            delta = deltas[review.station_id]
+            day = review_day(review)
+            for aspect, label, tier in aspect_results:
+                rating = existing.pop((review.id, aspect), None)
+                if rating is None:
+                    to_create.append(AspectRating(
+                        review=review, aspect=aspect, sentiment=label, model_version=version, decided_by=tier
+                    ))
+                    delta.add_aspect(aspect, label, day=day)
+                elif (rating.sentiment, rating.model_version, rating.decided_by) != (label, version, tier):
+                    delta.add_aspect(aspect, rating.sentiment, sign=-1, day=day)
+                    delta.add_aspect(aspect, label, day=day)
+                    rating.sentiment, rating.model_version, rating.decided_by = label, version, tier
+                    to_update.append(rating)
+            if review.sentiment != sentiment:
+                delta.add_sentiment(review.sentiment, sign=-1)
+                delta.add_sentiment(sentiment)
+                review.sentiment = sentiment
+                changed_reviews.append(review)
+
+        # Whatever is left in `existing` wasn't detected this time
+        for rating in duplicates + list(existing.values()):
+            review = reviews[rating.review_id]
+            deltas[review.station_id].add_aspect(rating.aspect, rating.sentiment, sign=-1, day=review_day(review))
+        to_delete = [rating.id for rating in duplicates] + [rating.id for rating in existing.values()]
+        if to_delete:
+            AspectRating.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            AspectRating.objects.bulk_update(to_update, ['sentiment', 'model_version', 'decided_by'])
+        if to_create:
+            AspectRating.objects.bulk_create(to_create)
+        if changed_reviews:
+            Review.objects.bulk_update(changed_reviews, ['sentiment'])
+        apply_stats_deltas(deltas)
+
+
+def stale_reviews(include_imported=False):
+    """Reviews whose aspect ratings are missing or were produced by another model/keyword version,
+    or that have no overall sentiment yet.
+
+    Ordered by priority: reviews of the busiest stations first, newest first
+    within a station. Reviews carrying imported human labels are left alone
+    unless include_imported is set.
+    """
+    current = analysis_version()
+    station_size = Station.objects.filter(pk=OuterRef('station_id')).annotate(
+        n=Count('reviews')
+    ).values('n')
+    reviews = Review.objects.annotate(
+        n_ratings=Count('aspects'),
+        n_current=Count('aspects', filter=Q(aspects__model_version=current)),
+        n_imported=Count('aspects', filter=Q(aspects__model_version=AspectRating.IMPORTED)),
+        station_size=Subquery(station_size),
+    ).filter(Q(n_ratings=0) | Q(n_current__lt=F('n_ratings')) | Q(sentiment=''))
+    if not include_imported:
+        reviews = reviews.filter(n_imported=0)
+    return reviews.order_by('-station_size', '-created_at', '-id')
 
 
 # Helper function to get aspects from database
 def get_aspects_from_db(reviews):
     """Get aspect sentiments aggregated from database."""
-    from collections import defaultdict
-    
+    return format_aspects(aspect_sentiment_counts(AspectRating.objects.filter(review__in=reviews)))
+
+
+def aspect_sentiment_counts(aspect_ratings):
+    """{aspect: {"Positive": n, "Negative": n, "Neutral": n}} in one GROUP BY query."""
+    rows = aspect_ratings.values('aspect').annotate(
+        n=Count('id'),
+        positive=Count('id', filter=Q(sentiment__iexact='positive')),
+        negative=Count('id', filter=Q(sentiment__iexact='negative')),
+    ).order_by()
+    # Anything that isn't Positive/Negative counts as Neutral (see stats.normalize_sentiment)
+    return {
+        row['aspect']: {
+            "Positive": row['positive'],
+            "Negative": row['negative'],
+            "Neutral": row['n'] - row['positive'] - row['negative'],
+        }
+        for row in rows
+    }
+
+
+def format_aspects(aspect_scores, trends=None):
+    """Endpoint format for {aspect: {"Positive": n, "Negative": n, "Neutral": n}} counts
+    and optional {aspect: "up" / "down" / "stable"} trends."""
+    trends = trends or {}
     # Define all 9 aspects - always return all of them in consistent order
     all_aspects = [
         "Cleanliness",
@@ -212,32 +756,19 @@ def get_aspects_from_db(reviews):
         "Ticketing system",
         "Women's Safety"
     ]
-    
-    # Get all aspect ratings for these reviews
-    aspect_ratings = AspectRating.objects.filter(review__in=reviews)
-    
-    # Aggregate by aspect and sentiment
-    aspect_scores = defaultdict(lambda: {"Positive": 0, "Negative": 0, "Neutral": 0, "count": 0})
-    
-    for ar in aspect_ratings:
-        sentiment = ar.sentiment.capitalize()
-        if sentiment not in ["Positive", "Negative", "Neutral"]:
-            sentiment = "Neutral"
-        aspect_scores[ar.aspect][sentiment] += 1
-        aspect_scores[ar.aspect]["count"] += 1
-    
+
     # Format result - always include all 9 aspects in consistent order
     result = {}
     for aspect in all_aspects:
-        scores = aspect_scores[aspect]
-        total = scores["count"]
+        scores = {sentiment: aspect_scores.get(aspect, {}).get(sentiment, 0) for sentiment in ["Positive", "Negative", "Neutral"]}
+        total = sum(scores.values())
         
         if total == 0:
             # No reviews for this aspect yet - default to Neutral with 0%
             result[aspect] = {
                 "sentiment": "Neutral",
                 "percentage": 0,
-                "trend": "stable"
+                "trend": trends.get(aspect, "stable")
             }
         else:
             pos_pct = int(scores["Positive"] / total * 100)
@@ -247,7 +778,7 @@ def get_aspects_from_db(reviews):
             result[aspect] = {
                 "sentiment": dominant,
                 "percentage": pos_pct if dominant == "Positive" else neg_pct if dominant == "Negative" else neut_pct,
-                "trend": "stable"
+                "trend": trends.get(aspect, "stable")
             }
     
     return result